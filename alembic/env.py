@@ -9,12 +9,13 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from app.database import SQLALCHEMY_DATABASE_URL
+from app.config import DatabaseSettings
+from app.database import database_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
+config.set_main_option("sqlalchemy.url", database_url(DatabaseSettings()))
 
 
 # Interpret the config file for Python logging.
@@ -0,0 +1,54 @@
+"""Added users and settings tables
+
+Revision ID: 3a9d5e1f7c20
+Revises: 04cee7e37e51
+Create Date: 2026-10-18 09:01:37.250916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9d5e1f7c20'
+down_revision = '04cee7e37e51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+                    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+                    sa.Column('username', sa.String(), nullable=False),
+                    sa.Column('name', sa.String(), nullable=False),
+                    sa.Column('email', sa.String(), nullable=False),
+                    sa.Column('hashed_password', sa.String(), nullable=False),
+                    sa.Column('verified', sa.Boolean(), server_default='False', nullable=False),
+                    sa.Column('role', sa.String(), server_default='user', nullable=False),
+                    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('email'),
+                    sa.UniqueConstraint('username'))
+    op.create_table('settings',
+                    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+                    sa.Column('notifications', sa.Boolean(), nullable=False),
+                    sa.Column('dark_mode', sa.Boolean(), nullable=False),
+                    sa.Column('language', sa.String(), nullable=False),
+                    sa.Column('timezone', sa.String(), nullable=False),
+                    sa.Column('country', sa.String(), nullable=False),
+                    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+                    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id'))
+
+
+def downgrade() -> None:
+    op.drop_table('settings')
+    op.drop_table('users')
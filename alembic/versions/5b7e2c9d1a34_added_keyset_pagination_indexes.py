@@ -0,0 +1,28 @@
+"""Added keyset pagination indexes
+
+Revision ID: 5b7e2c9d1a34
+Revises: 3a9d5e1f7c20
+Create Date: 2026-10-18 09:05:12.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9d1a34'
+down_revision = '3a9d5e1f7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], postgresql_concurrently=True)
+        op.create_index('ix_settings_created_at_id', 'settings', ['created_at', 'id'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_settings_created_at_id', table_name='settings', postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
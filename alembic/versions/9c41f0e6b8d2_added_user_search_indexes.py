@@ -0,0 +1,33 @@
+"""Added user search indexes
+
+Revision ID: 9c41f0e6b8d2
+Revises: 5b7e2c9d1a34
+Create Date: 2026-10-18 09:21:47.902511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c41f0e6b8d2'
+down_revision = '5b7e2c9d1a34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_username_trgm', 'users', ['username'], postgresql_concurrently=True,
+                        postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+        op.create_index('ix_users_email_trgm', 'users', ['email'], postgresql_concurrently=True,
+                        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+        op.create_index('ix_users_role', 'users', ['role'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_role', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_username_trgm', table_name='users', postgresql_concurrently=True)
@@ -1,14 +1,372 @@
-from aioredis import Redis
+import time
+import uuid
+import asyncio
+import logging
 
-from app.config import config
-from app.constants import REVOKED
+from datetime import timedelta
 
-redis_client = Redis(host=config.REDIS_HOST,
-                     port=config.REDIS_PORT,
-                     decode_responses=True,
-                     password=config.REDIS_PASSWORD)
+from app.config import AppSettings
+from app.cache_backends import CacheBackend, CacheScript, create_cache_backend
+from app.constants import (REVOKED, REVOKED_TOKENS_KEY, REVOCATIONS_CHANNEL, USER_INVALIDATIONS_CHANNEL,
+                           REVOCATION_EPOCH_KEY, REVOCATION_EPOCHS_KEY, REVOCATION_EPOCHS_CHANNEL,
+                           SETTINGS_ETAG_INVALIDATIONS_CHANNEL)
+from app.lru_cache import LRUCache
+from app.metrics import registry, redis_command_duration, GaugeCallback
 
+logger = logging.getLogger(__name__)
 
-async def token_in_deny_list(jti: str):
-    entry = await redis_client.get(jti)
-    return entry and entry == REVOKED
+VERSIONED_SET_LUA = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+async def versioned_set(backend: CacheBackend, keys: list, args: list) -> int:
+    if (await backend.get(keys[1]) or '') != args[0]:
+        return 0
+    await backend.setex(keys[0], args[2], args[1])
+    return 1
+
+
+VERSIONED_SET_SCRIPT = CacheScript(VERSIONED_SET_LUA, versioned_set)
+
+
+def token_lifetime(settings: AppSettings) -> timedelta:
+    return timedelta(minutes=max(settings.ACCESS_TOKEN_EXPIRES_IN, settings.REFRESH_TOKEN_EXPIRES_IN))
+
+
+class CacheSubscriber:
+    client: CacheBackend = None
+
+    def __init__(self, reconnect_delay: float = 1.0):
+        self.reconnect_delay = reconnect_delay
+        self._caches = {}
+
+    def register(self, cache):
+        self._caches[cache.channel] = cache
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(*self._caches)
+                    for cache in self._caches.values():
+                        await cache.resync()
+                        cache.synced = True
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is not None:
+                            self._caches[message['channel']].apply(message['data'])
+                        for cache in self._caches.values():
+                            cache.maintain()
+            except self.client.errors as exc:
+                logger.warning("Cache subscription lost: %s", exc)
+            finally:
+                for cache in self._caches.values():
+                    cache.synced = False
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class DenyList:
+    channel = REVOCATIONS_CHANNEL
+
+    client: CacheBackend = None
+
+    def __init__(self, prune_interval: float = 60.0):
+        self.prune_interval = prune_interval
+        self.synced = False
+        self._revoked = {}
+        self._last_prune = time.monotonic()
+
+    async def revoke(self, jti: str, expires_in: timedelta):
+        expires_at = time.time() + expires_in.total_seconds()
+        self._revoked[jti] = expires_at
+        start = time.perf_counter()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.setex(jti, expires_in, REVOKED)
+            pipe.zadd(REVOKED_TOKENS_KEY, {jti: expires_at})
+            pipe.publish(REVOCATIONS_CHANNEL, f'{jti} {expires_at}')
+            await pipe.execute()
+        redis_command_duration.observe(time.perf_counter() - start, 'deny_list_revoke')
+
+    def local_contains(self, jti: str) -> bool | None:
+        expires_at = self._revoked.get(jti)
+        if expires_at is not None:
+            if expires_at > time.time():
+                return True
+            del self._revoked[jti]
+        return False if self.synced else None
+
+    async def contains(self, jti: str) -> bool:
+        revoked = self.local_contains(jti)
+        if revoked is not None:
+            return revoked
+
+        start = time.perf_counter()
+        entry = await self.client.get(jti)
+        redis_command_duration.observe(time.perf_counter() - start, 'deny_list_get')
+        return entry == REVOKED
+
+    async def resync(self):
+        now = time.time()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, '-inf', now)
+            pipe.zrangebyscore(REVOKED_TOKENS_KEY, now, '+inf', withscores=True)
+            _, entries = await pipe.execute()
+        self._revoked = {jti: expires_at for jti, expires_at in entries}
+
+    def apply(self, message: str):
+        jti, expires_at = message.split(' ')
+        self._revoked[jti] = float(expires_at)
+
+    def maintain(self):
+        if time.monotonic() - self._last_prune < self.prune_interval:
+            return
+        now = time.time()
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        self._last_prune = time.monotonic()
+
+
+class RevocationEpochs:
+    channel = REVOCATION_EPOCHS_CHANNEL
+
+    client: CacheBackend = None
+
+    def __init__(self, lifetime: timedelta = None, prune_interval: float = 60.0):
+        self.lifetime = lifetime
+        self.prune_interval = prune_interval
+        self.synced = False
+        self._epochs = {}
+        self._last_prune = time.monotonic()
+
+    def configure(self, settings: AppSettings):
+        self.lifetime = token_lifetime(settings)
+
+    async def revoke_all(self, user_id: str) -> float:
+        epoch = time.time()
+        self._epochs[user_id] = epoch
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.setex(REVOCATION_EPOCH_KEY.format(user_id), self.lifetime, epoch)
+            pipe.zadd(REVOCATION_EPOCHS_KEY, {user_id: epoch})
+            pipe.publish(REVOCATION_EPOCHS_CHANNEL, f'{user_id} {epoch}')
+            await pipe.execute()
+        return epoch
+
+    def local_revoked(self, user_id: str, issued_at: float) -> bool | None:
+        epoch = self._epochs.get(user_id)
+        if epoch is not None and issued_at < epoch:
+            return True
+        return False if self.synced else None
+
+    async def resync(self):
+        now = time.time()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(REVOCATION_EPOCHS_KEY, '-inf', now - self.lifetime.total_seconds())
+            pipe.zrangebyscore(REVOCATION_EPOCHS_KEY, '-inf', '+inf', withscores=True)
+            _, entries = await pipe.execute()
+        self._epochs = {user_id: epoch for user_id, epoch in entries}
+
+    def apply(self, message: str):
+        user_id, epoch = message.split(' ')
+        self._epochs[user_id] = max(float(epoch), self._epochs.get(user_id, 0.0))
+
+    def maintain(self):
+        if time.monotonic() - self._last_prune < self.prune_interval:
+            return
+        cutoff = time.time() - self.lifetime.total_seconds()
+        self._epochs = {user_id: epoch for user_id, epoch in self._epochs.items() if epoch > cutoff}
+        self._last_prune = time.monotonic()
+
+
+class InvalidatingCache:
+    channel = None
+    key_prefix = None
+    metric_name = None
+
+    client: CacheBackend = None
+
+    def __init__(self):
+        self.ttl = None
+        self.synced = False
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._local = None
+        self._generation = 0
+
+    def configure(self, settings: AppSettings):
+        self.ttl = settings.USER_CACHE_TTL
+        self._local = LRUCache(maxsize=settings.USER_CACHE_SIZE)
+        self._generation += 1
+
+    def key(self, user_id: str) -> str:
+        return f'{self.key_prefix}:{user_id}'
+
+    def version_key(self, user_id: str) -> str:
+        return f'{self.key_prefix}_version:{user_id}'
+
+    def _fill_local(self, user_id: str, value: str, generation: int):
+        if self.synced and generation == self._generation:
+            self._local.set(user_id, value, expires_at=time.time() + self.ttl)
+
+    async def lookup(self, user_id: str) -> tuple[str | None, tuple | None]:
+        generation = self._generation
+        if self.synced:
+            value = self._local.get(user_id)
+            if value is not None:
+                self.local_hits += 1
+                return value, None
+
+        start = time.perf_counter()
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self.key(user_id))
+            pipe.get(self.version_key(user_id))
+            value, version = await pipe.execute()
+        redis_command_duration.observe(time.perf_counter() - start, f'{self.metric_name}_get')
+        if value is None:
+            self.misses += 1
+            return None, (version or '', generation)
+
+        self.redis_hits += 1
+        self._fill_local(user_id, value, generation)
+        return value, None
+
+    async def get(self, user_id: str) -> str | None:
+        value, _ = await self.lookup(user_id)
+        return value
+
+    async def set(self, user_id: str, value: str, version: tuple) -> bool:
+        version, generation = version
+        start = time.perf_counter()
+        stored = await self.client.run_script(VERSIONED_SET_SCRIPT, [self.key(user_id), self.version_key(user_id)],
+                                              [version, value, self.ttl])
+        redis_command_duration.observe(time.perf_counter() - start, f'{self.metric_name}_set')
+        if stored:
+            self._fill_local(user_id, value, generation)
+        return bool(stored)
+
+    async def invalidate(self, user_id: str):
+        self._generation += 1
+        self._local.pop(user_id)
+        start = time.perf_counter()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.setex(self.version_key(user_id), self.ttl, uuid.uuid4().hex)
+            pipe.delete(self.key(user_id))
+            pipe.publish(self.channel, user_id)
+            await pipe.execute()
+        redis_command_duration.observe(time.perf_counter() - start, f'{self.metric_name}_invalidate')
+
+    async def resync(self):
+        self._generation += 1
+        self._local.clear()
+
+    def apply(self, message: str):
+        self._generation += 1
+        self._local.pop(message)
+
+    def maintain(self):
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {'local_hits': self.local_hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'hit_rate': (self.local_hits + self.redis_hits) / lookups if lookups else 0.0}
+
+
+class UserCache(InvalidatingCache):
+    channel = USER_INVALIDATIONS_CHANNEL
+    key_prefix = 'user'
+    metric_name = 'user_cache'
+
+
+class SettingsETagCache(InvalidatingCache):
+    channel = SETTINGS_ETAG_INVALIDATIONS_CHANNEL
+    key_prefix = 'settings_etag'
+    metric_name = 'settings_etag'
+
+
+class CacheManager:
+    def __init__(self, subscriber: CacheSubscriber):
+        self.subscriber = subscriber
+        self.backend: CacheBackend | None = None
+        self._consumers = [subscriber]
+        self._listener = None
+
+    def bind(self, consumer):
+        consumer.client = self.backend
+        self._consumers.append(consumer)
+        return consumer
+
+    def unbind(self, consumer):
+        self._consumers.remove(consumer)
+        consumer.client = None
+
+    async def start(self, settings: AppSettings):
+        for consumer in self._consumers:
+            if hasattr(consumer, 'configure'):
+                consumer.configure(settings)
+        self.backend = create_cache_backend(settings)
+        try:
+            await self.backend.warm_up(settings.REDIS_WARMUP_CONNECTIONS)
+        except self.backend.errors as exc:
+            logger.warning("Cache warm-up failed: %s", exc)
+        for consumer in self._consumers:
+            consumer.client = self.backend
+        self._listener = asyncio.create_task(self.subscriber.listen())
+
+    async def shutdown(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+            self.backend = None
+
+
+cache_subscriber = CacheSubscriber()
+caches = CacheManager(cache_subscriber)
+
+deny_list = caches.bind(DenyList())
+revocation_epochs = caches.bind(RevocationEpochs())
+user_cache = caches.bind(UserCache())
+settings_etags = caches.bind(SettingsETagCache())
+
+cache_subscriber.register(deny_list)
+cache_subscriber.register(revocation_epochs)
+cache_subscriber.register(user_cache)
+cache_subscriber.register(settings_etags)
+
+CACHE_METRICS = (
+    ('local_hits_total', 'local_hits', 'lookups answered from process memory', 'counter'),
+    ('redis_hits_total', 'redis_hits', 'lookups answered from Redis', 'counter'),
+    ('misses_total', 'misses', 'lookups that fell through to the database', 'counter'),
+    ('hit_rate', 'hit_rate', 'share of lookups answered without the database', 'gauge'),
+)
+
+for cache in (user_cache, settings_etags):
+    for suffix, key, description, metric_type in CACHE_METRICS:
+        registry.register(GaugeCallback(f'{cache.metric_name}_{suffix}', f'{cache.metric_name} {description}',
+                                        lambda cache=cache, key=key: cache.stats()[key], metric_type))
+
+
+async def token_revoked(jti: str, user_id: str, issued_at: float) -> bool:
+    jti_revoked = deny_list.local_contains(jti)
+    epoch_revoked = revocation_epochs.local_revoked(user_id, issued_at)
+    if jti_revoked or epoch_revoked:
+        return True
+    if jti_revoked is False and epoch_revoked is False:
+        return False
+
+    start = time.perf_counter()
+    async with caches.backend.pipeline(transaction=False) as pipe:
+        pipe.get(jti)
+        pipe.get(REVOCATION_EPOCH_KEY.format(user_id))
+        entry, epoch = await pipe.execute()
+    redis_command_duration.observe(time.perf_counter() - start, 'token_revoked')
+    return entry == REVOKED or (epoch is not None and issued_at < float(epoch))
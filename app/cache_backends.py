@@ -0,0 +1,260 @@
+import time
+import heapq
+import asyncio
+
+from datetime import timedelta
+
+from app.constants import CacheBackendType
+
+
+class CacheScript:
+    def __init__(self, lua: str, fallback):
+        self.lua = lua
+        self.fallback = fallback
+
+
+class CacheBackend:
+    errors = (OSError,)
+
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def setex(self, key: str, ttl, value):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> int:
+        raise NotImplementedError
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    async def pexpire(self, key: str, ttl_ms) -> bool:
+        raise NotImplementedError
+
+    async def hset(self, key: str, field: str = None, value=None, mapping: dict = None) -> int:
+        raise NotImplementedError
+
+    async def hmget(self, key: str, fields: list, *args) -> list:
+        raise NotImplementedError
+
+    async def zadd(self, key: str, mapping: dict) -> int:
+        raise NotImplementedError
+
+    async def zcard(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def zrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        raise NotImplementedError
+
+    async def zrangebyscore(self, key: str, min, max, withscores: bool = False) -> list:
+        raise NotImplementedError
+
+    async def zremrangebyscore(self, key: str, min, max) -> int:
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message) -> int:
+        raise NotImplementedError
+
+    def pubsub(self):
+        raise NotImplementedError
+
+    def pipeline(self, transaction: bool = True):
+        raise NotImplementedError
+
+    async def run_script(self, script: CacheScript, keys: list, args: list):
+        raise NotImplementedError
+
+    async def warm_up(self, connections: int) -> int:
+        return 0
+
+    async def close(self):
+        raise NotImplementedError
+
+
+def seconds(ttl) -> float:
+    return ttl.total_seconds() if isinstance(ttl, timedelta) else float(ttl)
+
+
+class MemoryPipeline:
+    def __init__(self, backend: 'MemoryBackend'):
+        self.backend = backend
+        self._commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.backend, name)
+
+        def queue_command(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue_command
+
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+class MemoryPubSub:
+    def __init__(self, backend: 'MemoryBackend'):
+        self.backend = backend
+        self.channels = set()
+        self._messages = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for channel in self.channels:
+            self.backend.subscribers[channel].discard(self)
+        self.channels.clear()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.backend.subscribers.setdefault(channel, set()).add(self)
+            self.channels.add(channel)
+
+    def deliver(self, channel: str, message: str):
+        self._messages.put_nowait({'type': 'message', 'channel': channel, 'data': message})
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        try:
+            return await asyncio.wait_for(self._messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self):
+        self.subscribers = {}
+        self._data = {}
+        self._expires = {}
+        self._deadlines = []
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self._deadlines)
+            if self._expires.get(key) == deadline:
+                del self._expires[key]
+                self._data.pop(key, None)
+
+    def _lookup(self, key: str, default=None):
+        self._expire()
+        return self._data.get(key, default)
+
+    def _set_ttl(self, key: str, ttl_seconds: float):
+        deadline = time.monotonic() + ttl_seconds
+        self._expires[key] = deadline
+        heapq.heappush(self._deadlines, (deadline, key))
+
+    def _container(self, key: str, factory):
+        value = self._lookup(key)
+        if value is None:
+            value = self._data[key] = factory()
+        return value
+
+    async def get(self, key: str):
+        return self._lookup(key)
+
+    async def setex(self, key: str, ttl, value):
+        self._expire()
+        self._data[key] = str(value)
+        self._set_ttl(key, seconds(ttl))
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        self._expire()
+        deleted = 0
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                deleted += 1
+            self._expires.pop(key, None)
+        return deleted
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self._lookup(key, 0)) + amount
+        self._data[key] = str(value)
+        return value
+
+    async def pexpire(self, key: str, ttl_ms) -> bool:
+        if self._lookup(key) is None:
+            return False
+        self._set_ttl(key, float(ttl_ms) / 1000)
+        return True
+
+    async def hset(self, key: str, field: str = None, value=None, mapping: dict = None) -> int:
+        values = self._container(key, dict)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for item in items if item not in values)
+        values.update({item: str(item_value) for item, item_value in items.items()})
+        return added
+
+    async def hmget(self, key: str, fields: list, *args) -> list:
+        values = self._lookup(key, {})
+        return [values.get(field) for field in ([fields, *args] if isinstance(fields, str) else fields)]
+
+    async def zadd(self, key: str, mapping: dict) -> int:
+        members = self._container(key, dict)
+        added = sum(1 for member in mapping if member not in members)
+        members.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    async def zcard(self, key: str) -> int:
+        return len(self._lookup(key, {}))
+
+    async def zrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        ordered = sorted(self._lookup(key, {}).items(), key=lambda item: (item[1], item[0]))
+        selected = ordered[start:None if end == -1 else end + 1]
+        return selected if withscores else [member for member, _ in selected]
+
+    async def zrangebyscore(self, key: str, min, max, withscores: bool = False) -> list:
+        low, high = float(min), float(max)
+        ordered = sorted(self._lookup(key, {}).items(), key=lambda item: (item[1], item[0]))
+        selected = [(member, score) for member, score in ordered if low <= score <= high]
+        return selected if withscores else [member for member, _ in selected]
+
+    async def zremrangebyscore(self, key: str, min, max) -> int:
+        members = self._lookup(key)
+        if not members:
+            return 0
+        low, high = float(min), float(max)
+        removed = [member for member, score in members.items() if low <= score <= high]
+        for member in removed:
+            del members[member]
+        return len(removed)
+
+    async def publish(self, channel: str, message) -> int:
+        subscribers = self.subscribers.get(channel, ())
+        for subscriber in subscribers:
+            subscriber.deliver(channel, str(message))
+        return len(subscribers)
+
+    def pubsub(self) -> MemoryPubSub:
+        return MemoryPubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    async def run_script(self, script: CacheScript, keys: list, args: list):
+        return await script.fallback(self, keys, args)
+
+    async def close(self):
+        pass
+
+
+def create_cache_backend(settings) -> CacheBackend:
+    if settings.CACHE_BACKEND == CacheBackendType.MEMORY:
+        return MemoryBackend()
+    from app.redis_backend import RedisBackend
+    return RedisBackend(host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        password=settings.REDIS_PASSWORD,
+                        max_connections=settings.REDIS_MAX_CONNECTIONS)
@@ -1,4 +1,9 @@
-from pydantic import BaseSettings
+from typing import Optional
+from datetime import datetime
+
+from pydantic import BaseModel, BaseSettings
+
+from app.constants import RateLimitAlgorithm, EmailBackend, JWTBackend, CacheBackendType
 
 
 class DatabaseSettings(BaseSettings):
@@ -9,14 +14,30 @@ class DatabaseSettings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_HOSTNAME: str
 
+    DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 10.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_STATEMENT_CACHE_SIZE: int = 256
+    DATABASE_WARMUP_CONNECTIONS: int = 5
+
     class Config:
         env_file = './.env'
 
 
 class RedisSettings(BaseSettings):
-    REDIS_PASSWORD: str
-    REDIS_HOST: str
-    REDIS_PORT: int
+    CACHE_BACKEND: CacheBackendType = CacheBackendType.REDIS
+
+    REDIS_PASSWORD: Optional[str] = None
+    REDIS_HOST: str = 'localhost'
+    REDIS_PORT: int = 6379
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_WARMUP_CONNECTIONS: int = 5
+
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 300
 
     class Config:
         env_file = './.env'
@@ -28,19 +49,49 @@ class EmailSettings(BaseSettings):
     EMAIL_USERNAME: str
     EMAIL_PASSWORD: str
     EMAIL_FROM: str
+    EMAIL_BACKEND: EmailBackend = EmailBackend.SMTP
+    EMAIL_POOL_SIZE: int = 2
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_RETRY_BACKOFF: float = 1.0
+    EMAIL_TIMEOUT: float = 10.0
+
+    class Config:
+        env_file = './.env'
+
+
+class PasswordHashingSettings(BaseSettings):
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1
 
     class Config:
         env_file = './.env'
 
 
-class AppSettings(DatabaseSettings, RedisSettings, EmailSettings):
-    JWT_PRIVATE_KEY: str
-    JWT_PUBLIC_KEY: str
-    JWT_ALGORITHM: str
+class JWTKeyConfig(BaseModel):
+    kid: str
+    algorithm: str
+    signing_key: Optional[str] = None
+    verifying_key: Optional[str] = None
+    active_from: Optional[datetime] = None
+    retire_at: Optional[datetime] = None
+    backend: Optional[JWTBackend] = None
+
+
+class AppSettings(DatabaseSettings, RedisSettings, EmailSettings, PasswordHashingSettings):
+    JWT_PRIVATE_KEY: Optional[str] = None
+    JWT_PUBLIC_KEY: Optional[str] = None
+    JWT_ALGORITHM: Optional[str] = None
+    JWT_ACCESS_KEYS: list[JWTKeyConfig] = []
+    JWT_REFRESH_KEYS: list[JWTKeyConfig] = []
+    JWKS_MAX_AGE: int = 300
 
     REFRESH_TOKEN_EXPIRES_IN: int
     ACCESS_TOKEN_EXPIRES_IN: int
     VERIFICATION_TOKEN_EXPIRES_IN: int
+    VERIFIED_TOKEN_CACHE_SIZE: int = 10000
 
     VERIFICATION_ALGORITHM: str
     VERIFICATION_SECRET_KEY: str
@@ -51,6 +102,7 @@ class AppSettings(DatabaseSettings, RedisSettings, EmailSettings):
 
     RATE_LIMIT: int
     RATE_LIMIT_INTERVAL: int
+    RATE_LIMIT_ALGORITHM: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_WINDOW
 
     class Config:
         env_file = './.env'
@@ -59,7 +111,10 @@ class AppSettings(DatabaseSettings, RedisSettings, EmailSettings):
 class LogConfig(BaseSettings):
     LOGGER_NAME: str = "app"
     LOG_FORMAT: str = "%(levelprefix)s | %(asctime)s | %(message)s"
-    LOG_LEVEL: str = "DEBUG"
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_QUEUE: bool = True
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
 
     version = 1
     disable_existing_loggers = False
@@ -69,6 +124,9 @@ class LogConfig(BaseSettings):
             "fmt": LOG_FORMAT,
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
+        "json": {
+            "()": "app.logs.JsonFormatter",
+        },
     }
     handlers = {
         "default": {
@@ -81,5 +139,3 @@ class LogConfig(BaseSettings):
         LOGGER_NAME: {"handlers": ["default"], "level": LOG_LEVEL},
     }
 
-
-config = AppSettings()
@@ -1,5 +1,9 @@
+import uuid
+
 from enum import Enum
 
+WARMUP_ID = uuid.UUID(int=0)
+
 ACCESS_TOKEN = 'access_token'
 REFRESH_TOKEN = 'refresh_token'
 VERIFICATION_TOKEN = 'verification_token'
@@ -23,3 +27,43 @@ class RoleType(str, Enum):
 
 
 REVOKED = 'revoked'
+REVOKED_TOKENS_KEY = 'revoked_tokens'
+REVOCATIONS_CHANNEL = 'revocations'
+USER_INVALIDATIONS_CHANNEL = 'user_invalidations'
+SETTINGS_ETAG_INVALIDATIONS_CHANNEL = 'settings_etag_invalidations'
+REFRESH_FAMILY_KEY = 'refresh_family:{}'
+REVOCATION_EPOCH_KEY = 'revocation_epoch:{}'
+REVOCATION_EPOCHS_KEY = 'revocation_epochs'
+REVOCATION_EPOCHS_CHANNEL = 'revocation_epochs'
+
+
+class RateLimitAlgorithm(str, Enum):
+    SLIDING_WINDOW = 'sliding_window'
+    TOKEN_BUCKET = 'token_bucket'
+
+
+class JWTBackend(str, Enum):
+    JOSE = 'jose'
+    CRYPTOGRAPHY = 'cryptography'
+
+
+class CacheBackendType(str, Enum):
+    REDIS = 'redis'
+    MEMORY = 'memory'
+
+
+class EmailBackend(str, Enum):
+    SMTP = 'smtp'
+    SINK = 'sink'
+
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+BULK_IMPORT_BATCH_SIZE = 500
+
+
+class SearchMatch(str, Enum):
+    CONTAINS = 'contains'
+    PREFIX = 'prefix'
@@ -1,41 +1,22 @@
-import inspect
-
 from abc import ABC
 from typing import Dict
 
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.base_model import Base
-
-
-class TransactionMeta(type):
-    def __new__(cls, name, bases, dct):
-        for method_name, method in dct.items():
-            if inspect.iscoroutinefunction(method):
-                dct[method_name] = cls.wrap_with_transaction(method)
-
-        return super(TransactionMeta, cls).__new__(cls, name, bases, dct)
-
-    @classmethod
-    def wrap_with_transaction(cls, method):
-        async def wrapper(self, db: AsyncSession, *args, **kwargs):
-            async with db.begin():
-                return method(self, db, *args, **kwargs)
-        return wrapper
+from app.utils import ProcessCursor
+from app.constants import WARMUP_ID
 
 
 class BaseController(ABC):
     model = None
-    __metaclass__ = TransactionMeta
 
     @classmethod
     async def create(cls, db: AsyncSession, data: Dict) -> model:
-        new_instance = cls.model(**data)
-        db.add(new_instance)
-        await db.commit()
-        await db.refresh(new_instance)
-        return new_instance
+        return await db.scalar(
+            insert(cls.model).values(**data).returning(cls.model)
+        )
 
     @classmethod
     async def get(cls, db: AsyncSession, obj_id: str) -> model:
@@ -43,6 +24,10 @@ class BaseController(ABC):
             select(cls.model).filter(cls.model.id == obj_id)
         )).scalar()
 
+    @classmethod
+    async def warm_up(cls, db: AsyncSession):
+        await cls.get(db, WARMUP_ID)
+
     @classmethod
     async def all(cls, db: AsyncSession, filters: list = None) -> list:
         if not filters:
@@ -50,16 +35,31 @@ class BaseController(ABC):
         return [el[0] for el in (await db.execute(select(cls.model).filter(*filters)))]
 
     @classmethod
-    async def update(cls, db: AsyncSession, obj: Base, data: Dict) -> model:
-        for key, value in data.items():
-            if hasattr(obj, key):
-                setattr(obj, key, value)
-        await db.commit()
-        await db.refresh(obj)
-        return obj
+    async def page(cls, db: AsyncSession, limit: int, cursor: str = None,
+                   filters: list = None) -> tuple[list, str | None]:
+        query = select(cls.model).filter(*(filters or []))
+        if cursor:
+            created_at, obj_id = ProcessCursor.decode_cursor(cursor)
+            query = query.filter(tuple_(cls.model.created_at, cls.model.id) > (created_at, obj_id))
+        query = query.order_by(cls.model.created_at, cls.model.id).limit(limit + 1)
+
+        items = list((await db.scalars(query)).all())
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, ProcessCursor.encode_cursor(items[-1].created_at, items[-1].id)
+
+    @classmethod
+    async def update(cls, db: AsyncSession, obj: Base, data: Dict, filters: list = None) -> model:
+        values = {key: value for key, value in data.items() if hasattr(cls.model, key)}
+        if not values:
+            return obj
+        return await db.scalar(
+            update(cls.model).filter(cls.model.id == obj.id, *(filters or [])).values(**values).returning(cls.model)
+            .execution_options(populate_existing=True)
+        )
 
     @classmethod
     async def delete(cls, db: AsyncSession, obj) -> bool:
-        await db.delete(obj)
-        await db.commit()
+        await db.execute(delete(cls.model).filter(cls.model.id == obj.id))
         return True
@@ -1,8 +1,13 @@
+from typing import Dict
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.models import Settings
+from app.database import after_commit
+from app.cache import settings_etags
+from app.constants import WARMUP_ID
 
 from .base_controller import BaseController
 
@@ -15,3 +20,31 @@ class SettingsController(BaseController):
         return (await db.execute(
             select(cls.model).filter(cls.model.user_id == user_id)
         )).scalar()
+
+    @classmethod
+    async def warm_up(cls, db: AsyncSession):
+        await super().warm_up(db)
+        await cls.get_by_user_id(db, WARMUP_ID)
+
+    @classmethod
+    async def create(cls, db: AsyncSession, data: Dict) -> model:
+        user_id = str(data['user_id'])
+        settings = await super().create(db, data)
+        after_commit(db, lambda: settings_etags.invalidate(user_id))
+        return settings
+
+    @classmethod
+    async def update(cls, db: AsyncSession, obj: Settings, data: Dict, if_unmodified: bool = False) -> model:
+        user_ids = {str(obj.user_id), str(data.get('user_id', obj.user_id))}
+        filters = [cls.model.updated_at == obj.updated_at] if if_unmodified else []
+        settings = await super().update(db, obj, data, filters)
+        for user_id in user_ids:
+            after_commit(db, lambda user_id=user_id: settings_etags.invalidate(user_id))
+        return settings
+
+    @classmethod
+    async def delete(cls, db: AsyncSession, obj: Settings) -> bool:
+        user_id = str(obj.user_id)
+        deleted = await super().delete(db, obj)
+        after_commit(db, lambda: settings_etags.invalidate(user_id))
+        return deleted
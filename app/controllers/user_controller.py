@@ -1,12 +1,19 @@
+import uuid
+
 from typing import Dict
 
-from pydantic import EmailStr
-from sqlalchemy import select
+from pydantic import EmailStr, ValidationError
+from sqlalchemy import select, update, literal, exists, or_
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas import RegisterUserSchema
+from app.schemas import RegisterUserSchema, CachedUserSchema, BulkImportResponse, BulkImportRowError
 from app.models.users_model import Users
-from app.utils import ProcessPassword
+from app.database import after_commit
+from app.hashing import password_hasher
+from app.cache import user_cache, settings_etags
+from app.constants import SearchMatch
 
 from .base_controller import BaseController
 from .settings_controller import SettingsController
@@ -17,12 +24,87 @@ class UserController(BaseController):
 
     @classmethod
     async def create(cls, db: AsyncSession, data: Dict) -> model:
-        user_instance = await super().create(db, data)
-        user_settings = await SettingsController.create(db, {'user_id': user_instance.id})
-        db.add_all([user_instance, user_settings])
-        await db.commit()
-        await db.refresh(user_instance)
-        return user_instance
+        new_user = (insert(cls.model).values(id=uuid.uuid4(), **data).on_conflict_do_nothing()
+                    .returning(*cls.model.__table__.c).cte('new_user'))
+        new_settings = (insert(SettingsController.model)
+                        .from_select(['id', 'user_id'],
+                                     select(literal(uuid.uuid4(), UUID(as_uuid=True)), new_user.c.id))
+                        .returning(SettingsController.model.user_id).cte('new_settings'))
+        user = aliased(cls.model, new_user)
+        return await db.scalar(select(user).join(new_settings, new_settings.c.user_id == user.id))
+
+    @classmethod
+    async def get_cached(cls, db: AsyncSession, user_id: str) -> model:
+        cached, version = await user_cache.lookup(user_id)
+        if cached is not None:
+            return cls.model(**CachedUserSchema.parse_raw(cached).dict())
+
+        user = await cls.get(db, user_id)
+        if user:
+            await user_cache.set(user_id, CachedUserSchema.from_orm(user).json(), version)
+        return user
+
+    @classmethod
+    async def update(cls, db: AsyncSession, obj: Users, data: Dict) -> model:
+        user_id = str(obj.id)
+        user = await super().update(db, obj, data)
+        after_commit(db, lambda: user_cache.invalidate(user_id))
+        return user
+
+    @classmethod
+    async def delete(cls, db: AsyncSession, obj: Users) -> bool:
+        user_id = str(obj.id)
+        deleted = await super().delete(db, obj)
+        after_commit(db, lambda: user_cache.invalidate(user_id))
+        after_commit(db, lambda: settings_etags.invalidate(user_id))
+        return deleted
+
+    @classmethod
+    async def bulk_create(cls, db: AsyncSession, rows: list[Dict]) -> list:
+        if not rows:
+            return []
+        created = (await db.execute(
+            insert(cls.model).values(rows).on_conflict_do_nothing().returning(cls.model.id, cls.model.username)
+        )).all()
+        if created:
+            await db.execute(
+                insert(SettingsController.model).values([{'id': uuid.uuid4(), 'user_id': row.id} for row in created])
+            )
+        return created
+
+    @classmethod
+    async def import_batch(cls, db: AsyncSession, batch: list[tuple[int, object]], report: BulkImportResponse):
+        payloads, usernames, emails = [], set(), set()
+        for row_number, row in batch:
+            try:
+                payload = RegisterUserSchema.parse_obj(row)
+            except ValidationError as exc:
+                detail = '; '.join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+                report.errors.append(BulkImportRowError(row=row_number, detail=detail))
+                continue
+
+            payload.email = EmailStr(payload.email.lower())
+            if payload.username in usernames or payload.email in emails:
+                report.conflicts.append(BulkImportRowError(row=row_number, detail='Duplicate account in this import'))
+                continue
+            usernames.add(payload.username)
+            emails.add(payload.email)
+            payloads.append((row_number, payload))
+
+        hashed_passwords = await password_hasher.hash_passwords([payload.hashed_password for _, payload in payloads])
+        rows = [{**payload.dict(), 'id': uuid.uuid4(), 'hashed_password': hashed_password}
+                for (_, payload), hashed_password in zip(payloads, hashed_passwords)]
+        created = {row.username for row in await cls.bulk_create(db, rows)}
+
+        report.created += len(created)
+        for row_number, payload in payloads:
+            if payload.username not in created:
+                report.conflicts.append(BulkImportRowError(row=row_number, detail='Account already exist'))
+
+    @classmethod
+    async def account_exists(cls, db: AsyncSession, username: str, email: str) -> bool:
+        return await db.scalar(select(exists().where(or_(cls.model.username == username,
+                                                         cls.model.email == email.lower()))))
 
     @classmethod
     async def get_by_username(cls, db: AsyncSession, username: str) -> model:
@@ -30,24 +112,48 @@ class UserController(BaseController):
             select(cls.model).filter(cls.model.username == username)
         )).scalar()
 
+    @classmethod
+    async def warm_up(cls, db: AsyncSession):
+        await super().warm_up(db)
+        await cls.get_by_username(db, '')
+
+    @staticmethod
+    def like_pattern(term: str, match: SearchMatch) -> str:
+        escaped = term.replace('/', '//').replace('%', '/%').replace('_', '/_')
+        if match == SearchMatch.PREFIX:
+            return f'{escaped}%'
+        return f'%{escaped}%'
+
+    @classmethod
+    def search_filters(cls, username: str = None, email: str = None, role: str = None,
+                       match: SearchMatch = SearchMatch.CONTAINS) -> list:
+        filters = []
+        if username:
+            filters.append(cls.model.username.ilike(cls.like_pattern(username, match), escape='/'))
+        if email:
+            filters.append(cls.model.email.ilike(cls.like_pattern(email, match), escape='/'))
+        if role:
+            filters.append(cls.model.role == role)
+        return filters
+
     @classmethod
     async def authenticate_user(cls, db: AsyncSession, username: str, password: str):
         user = await cls.get_by_username(db, username)
         if not user:
             return False
-        if not ProcessPassword.verify_password(password, user.hashed_password):
+        if not await password_hasher.verify_password(password, user.hashed_password):
             return False
         return user
 
     @classmethod
     async def verify_user(cls, db: AsyncSession, user: Users):
-        user.verified = True
-        db.add(user)
-        await db.commit()
+        await db.execute(update(cls.model).filter(cls.model.id == user.id).values(verified=True))
+        user_id = str(user.id)
+        after_commit(db, lambda: user_cache.invalidate(user_id))
 
     @staticmethod
-    def transform_payload(payload: RegisterUserSchema):
-        payload.hashed_password = ProcessPassword.hash_password(payload.hashed_password)
+    async def transform_payload(payload: RegisterUserSchema):
+        payload.hashed_password = await password_hasher.hash_password(payload.hashed_password)
         payload.verified = False
         payload.email = EmailStr(payload.email.lower())
         return payload
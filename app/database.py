@@ -1,26 +1,158 @@
+import time
+import asyncio
+import logging
+
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
 from sqlalchemy.ext.asyncio import create_async_engine
 
-from app.config import config
+from app.config import DatabaseSettings
+from app.metrics import registry, db_statement_duration, GaugeCallback
+
+logger = logging.getLogger(__name__)
+
+
+def database_url(settings: DatabaseSettings) -> str:
+    return "postgresql+asyncpg://{}:{}@{}:{}/{}".format(settings.POSTGRES_USER,
+                                                        settings.POSTGRES_PASSWORD,
+                                                        settings.POSTGRES_HOSTNAME,
+                                                        settings.DATABASE_PORT,
+                                                        settings.POSTGRES_DB)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
 
-SQLALCHEMY_DATABASE_URL = "postgresql+asyncpg://{}:{}@{}:{}/{}".format(config.POSTGRES_USER,
-                                                                       config.POSTGRES_PASSWORD,
-                                                                       config.POSTGRES_HOSTNAME,
-                                                                       config.DATABASE_PORT,
-                                                                       config.POSTGRES_DB)
 
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL, echo=True
-)
 Base = declarative_base()
 
-async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+
+def statement_operation(context) -> str:
+    if context.isinsert:
+        return 'insert'
+    if context.isupdate:
+        return 'update'
+    if context.isdelete:
+        return 'delete'
+    return 'select'
+
+
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    context.statement_started = time.perf_counter()
+
+
+def observe_statement(conn, cursor, statement, parameters, context, executemany):
+    db_statement_duration.observe(time.perf_counter() - context.statement_started, statement_operation(context))
+
+
+class Database:
+    def __init__(self):
+        self.engine = None
+        self.session_factory = None
+
+    def start(self, settings: DatabaseSettings):
+        self.engine = create_async_engine(
+            database_url(settings),
+            echo=settings.DATABASE_ECHO,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+            connect_args={'prepared_statement_cache_size': settings.DATABASE_STATEMENT_CACHE_SIZE}
+        )
+        event.listen(self.engine.sync_engine, 'before_cursor_execute', start_statement_timer)
+        event.listen(self.engine.sync_engine, 'after_cursor_execute', observe_statement)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def warm_up(self, connections: int, primers: list) -> int:
+        connections = min(connections, self.engine.sync_engine.pool.size())
+        results = await asyncio.gather(*(self.engine.connect().start() for _ in range(connections)),
+                                       return_exceptions=True)
+        opened = [result for result in results if isinstance(result, AsyncConnection)]
+        results += await asyncio.gather(*(self._prime(connection, primers) for connection in opened),
+                                        return_exceptions=True)
+        await asyncio.gather(*(connection.close() for connection in opened))
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logger.warning("Database warm-up opened %d of %d connections: %s", len(opened), connections, errors[0])
+        return len(opened)
+
+    @staticmethod
+    async def _prime(connection: AsyncConnection, primers: list):
+        async with AsyncSession(bind=connection) as db:
+            for primer in primers:
+                await primer(db)
+
+    async def shutdown(self):
+        await self.engine.dispose()
+        self.engine = None
+        self.session_factory = None
+
+    def pool_stats(self) -> dict:
+        if self.engine is None:
+            return dict.fromkeys(('size', 'checked_out', 'checked_in', 'overflow', 'checkouts',
+                                  'wait_time_total', 'wait_time_max'), 0)
+        pool = self.engine.sync_engine.pool
+        return {'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'checkouts': pool.checkouts,
+                'wait_time_total': pool.wait_time,
+                'wait_time_max': pool.max_wait_time}
+
+
+database = Database()
+
+
+POOL_METRICS = (
+    ('db_pool_size', 'size', 'Configured pool size', 'gauge'),
+    ('db_pool_checked_out', 'checked_out', 'Connections in use', 'gauge'),
+    ('db_pool_checked_in', 'checked_in', 'Idle connections in the pool', 'gauge'),
+    ('db_pool_overflow', 'overflow', 'Connections opened beyond the pool size', 'gauge'),
+    ('db_pool_checkouts_total', 'checkouts', 'Connection checkouts', 'counter'),
+    ('db_pool_wait_seconds_total', 'wait_time_total', 'Time spent waiting for a connection', 'counter'),
+    ('db_pool_wait_seconds_max', 'wait_time_max', 'Longest wait for a connection', 'gauge'),
 )
 
+for metric_name, key, description, metric_type in POOL_METRICS:
+    registry.register(GaugeCallback(metric_name, description, lambda key=key: database.pool_stats()[key], metric_type))
+
+
+def after_commit(db: AsyncSession, callback):
+    db.info.setdefault('after_commit', []).append(callback)
+
+
+async def commit(db: AsyncSession):
+    await db.commit()
+    for callback in db.info.pop('after_commit', []):
+        try:
+            await callback()
+        except Exception:
+            logger.exception("after_commit callback %r failed", callback)
+
 
-async def get_db():
-    async with async_session() as db:
+async def get_db(request: Request):
+    async with database.session_factory() as db:
+        request.state.db = db
         yield db
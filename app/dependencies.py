@@ -1,4 +1,4 @@
-from fastapi import Depends, Request
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils import ProcessToken
@@ -6,21 +6,42 @@ from app.database import get_db
 from app.controllers import UserController
 from app.models import Users
 from app.oauth2 import oauth2_scheme
-from app.cache import token_in_deny_list
+from app.cache import token_revoked
 from app.constants import TokenType
+from app.schemas import TokenData
 from app.exceptions import UnauthorizedException
 
 
-async def get_current_user(db: AsyncSession = Depends(get_db),
-                           token: str = Depends(oauth2_scheme)) -> Users:
-    token_data = ProcessToken.validate_token(token, token_type=TokenType.ACCESS)
-    return await UserController.get(db, str(token_data.user_id))
+class AuthContext:
+    def __init__(self, db: AsyncSession, token: str, token_data: TokenData):
+        self.db = db
+        self.token = token
+        self.token_data = token_data
+        self._user = None
+        self._user_loaded = False
 
+    async def get_user(self) -> Users | None:
+        if not self._user_loaded:
+            self._user = await UserController.get_cached(self.db, self.token_data.user_id)
+            self._user_loaded = True
+        return self._user
 
-def check_token_revocation(token_type: TokenType):
-    async def check_id_token_revoked(request: Request):
-        token = await oauth2_scheme(request)
-        token_data = ProcessToken.validate_token(token, token_type=token_type)
-        if await token_in_deny_list(token_data.jti):
+
+class AuthContextDependency:
+    def __init__(self, token_type: TokenType):
+        self.token_type = token_type
+
+    async def __call__(self, db: AsyncSession = Depends(get_db),
+                       token: str = Depends(oauth2_scheme)) -> AuthContext:
+        token_data = ProcessToken.validate_token(token, token_type=self.token_type)
+        if await token_revoked(token_data.jti, token_data.user_id, token_data.iat):
             raise UnauthorizedException(detail="Token has been revoked")
-    return check_id_token_revoked
+        return AuthContext(db, token, token_data)
+
+
+access_token_context = AuthContextDependency(TokenType.ACCESS)
+refresh_token_context = AuthContextDependency(TokenType.REFRESH)
+
+
+async def get_current_user(context: AuthContext = Depends(access_token_context)) -> Users:
+    return await context.get_user()
@@ -1,26 +1,203 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import asyncio
+import logging
+
+from collections import deque
+from email.message import EmailMessage
+
+from aiosmtplib import (SMTP, SMTPException, SMTPResponseException, SMTPRecipientsRefused, SMTPHeloError,
+                        SMTPNotSupported)
 from pydantic import EmailStr
 
-from jinja2 import Environment, select_autoescape, PackageLoader
+from app.config import EmailSettings
+from app.constants import EmailBackend
+from app.metrics import registry, GaugeCallback
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAMES = ('verification',)
+
+templates = {}
+
+
+def load_templates():
+    if templates:
+        return
+    from jinja2 import Environment, select_autoescape, PackageLoader
+    env = Environment(
+        loader=PackageLoader('app', 'templates'),
+        autoescape=select_autoescape(['html', 'xml'])
+    )
+    templates.update({name: env.get_template(f'{name}.html') for name in TEMPLATE_NAMES})
+
+
+class DeliveryError(Exception):
+    def __init__(self, processed: int, rejected: int, cause: Exception):
+        super().__init__(str(cause))
+        self.processed = processed
+        self.rejected = rejected
+
+
+def is_permanent(exc: SMTPException) -> bool:
+    if isinstance(exc, SMTPRecipientsRefused):
+        return all(recipient.code >= 500 for recipient in exc.recipients)
+    if isinstance(exc, SMTPResponseException):
+        return exc.code >= 500 and not isinstance(exc, SMTPHeloError)
+    return isinstance(exc, SMTPNotSupported)
+
+
+class SMTPBackend:
+    def __init__(self, settings: EmailSettings):
+        self.settings = settings
+        self.pool_size = settings.EMAIL_POOL_SIZE
+        self.timeout = settings.EMAIL_TIMEOUT
+        self._pool = asyncio.LifoQueue()
+
+    def _client(self) -> SMTP:
+        return SMTP(hostname=self.settings.EMAIL_HOST,
+                    port=int(self.settings.EMAIL_PORT),
+                    username=self.settings.EMAIL_USERNAME,
+                    password=self.settings.EMAIL_PASSWORD,
+                    use_tls=True,
+                    validate_certs=True,
+                    timeout=self.timeout)
+
+    async def start(self):
+        for _ in range(self.pool_size):
+            self._pool.put_nowait(self._client())
+
+    async def close(self):
+        while not self._pool.empty():
+            client = self._pool.get_nowait()
+            if client.is_connected:
+                try:
+                    await client.quit()
+                except (SMTPException, OSError):
+                    client.close()
 
-from app.config import config
+    async def send_batch(self, messages: list[EmailMessage]) -> int:
+        client = await self._pool.get()
+        processed = 0
+        rejected = 0
+        try:
+            if not client.is_connected:
+                await client.connect()
+            for message in messages:
+                try:
+                    await client.send_message(message)
+                except SMTPException as exc:
+                    if not is_permanent(exc):
+                        raise
+                    rejected += 1
+                    logger.error("Email to %s was rejected: %s", message['To'], exc)
+                processed += 1
+        except (SMTPException, OSError) as exc:
+            client.close()
+            raise DeliveryError(processed, rejected, exc) from exc
+        finally:
+            self._pool.put_nowait(client)
+        return rejected
 
-env = Environment(
-    loader=PackageLoader('app', 'templates'),
-    autoescape=select_autoescape(['html', 'xml'])
-)
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=config.EMAIL_USERNAME,
-    MAIL_PASSWORD=config.EMAIL_PASSWORD,
-    MAIL_FROM=config.EMAIL_FROM,
-    MAIL_PORT=config.EMAIL_PORT,
-    MAIL_SERVER=config.EMAIL_HOST,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+class SinkBackend:
+    def __init__(self, maxlen: int = 1000):
+        self.sent = 0
+        self.messages = deque(maxlen=maxlen)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def send_batch(self, messages: list[EmailMessage]) -> int:
+        self.sent += len(messages)
+        self.messages.extend(messages)
+        return 0
+
+
+class EmailDelivery:
+    def __init__(self):
+        self.backend = None
+        self.sender = None
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self._queue = None
+        self._tasks = []
+
+    async def start(self, settings: EmailSettings):
+        load_templates()
+        self.backend = EMAIL_BACKENDS[settings.EMAIL_BACKEND](settings)
+        self.sender = settings.EMAIL_FROM
+        self.workers = settings.EMAIL_POOL_SIZE
+        self.batch_size = settings.EMAIL_BATCH_SIZE
+        self.max_retries = settings.EMAIL_MAX_RETRIES
+        self.retry_backoff = settings.EMAIL_RETRY_BACKOFF
+        self._queue = asyncio.Queue(maxsize=settings.EMAIL_QUEUE_SIZE)
+        await self.backend.start()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def shutdown(self, timeout: float = 10.0):
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            if self._queue.qsize():
+                logger.warning("Dropping %d undelivered emails on shutdown", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.backend.close()
+
+    def send(self, message: EmailMessage):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error("Email queue is full, dropping email to %s", message['To'])
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Failed to deliver a batch of %d emails", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: list[EmailMessage]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.rejected += await self.backend.send_batch(batch)
+                return
+            except DeliveryError as exc:
+                self.rejected += exc.rejected
+                batch = batch[exc.processed:]
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    logger.error("Giving up on %d emails: %s", len(batch), exc)
+                    return
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+
+EMAIL_BACKENDS = {
+    EmailBackend.SMTP: SMTPBackend,
+    EmailBackend.SINK: lambda settings: SinkBackend(),
+}
+
+email_delivery = EmailDelivery()
+
+registry.register(GaugeCallback('email_failed_total', 'Emails given up on after retries',
+                                lambda: email_delivery.failed, 'counter'))
+registry.register(GaugeCallback('email_rejected_total', 'Emails permanently rejected by the SMTP server',
+                                lambda: email_delivery.rejected, 'counter'))
+registry.register(GaugeCallback('email_dropped_total', 'Emails dropped because the delivery queue was full',
+                                lambda: email_delivery.dropped, 'counter'))
 
 
 class Email:
@@ -40,20 +217,14 @@ class Email:
 
     @staticmethod
     async def send_mail(data, subject, template):
-        # Generate the HTML template base on the template name
-        template = env.get_template(f'{template}.html')
         emails = data.pop('emails', [])
-        html = template.render(
+        html = templates[template].render(
             **data,
             subject=subject
         )
-        # Define the message options
-        message = MessageSchema(
-            subject=subject,
-            recipients=emails,
-            body=html,
-            subtype="html"
-        )
-        # Send the email
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = email_delivery.sender
+        message['To'] = ', '.join(emails)
+        message.set_content(html, subtype='html')
+        email_delivery.send(message)
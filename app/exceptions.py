@@ -25,3 +25,15 @@ class NotFoundException(HTTPException):
 class ConflictException(HTTPException):
     def __init__(self, detail: str = None):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class PreconditionFailedException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=detail)
+
+
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, detail: str = None, retry_after: int = None):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+        if retry_after is not None:
+            self.headers = {"Retry-After": str(retry_after)}
@@ -0,0 +1,75 @@
+import time
+import asyncio
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import PasswordHashingSettings
+from app.utils import ProcessPassword
+from app.exceptions import ServiceUnavailableException
+from app.metrics import password_hash_queue_duration, password_hash_duration
+
+
+def run_timed(func, *args):
+    started_at = time.time()
+    result = func(*args)
+    return started_at, time.time() - started_at, result
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.workers = None
+        self.max_pending = None
+        self.retry_after = None
+        self.pending = 0
+        self._executor = None
+
+    def start(self, settings: PasswordHashingSettings):
+        self.workers = settings.PASSWORD_HASH_WORKERS
+        self.max_pending = settings.PASSWORD_HASH_MAX_PENDING
+        self.retry_after = settings.PASSWORD_HASH_RETRY_AFTER
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        self.pending += 1
+        submitted_at = time.time()
+        try:
+            started_at, duration, result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, run_timed, func, *args
+            )
+        finally:
+            self.pending -= 1
+        password_hash_queue_duration.observe(max(started_at - submitted_at, 0.0), func.__name__)
+        password_hash_duration.observe(duration, func.__name__)
+        return result
+
+    async def _submit(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableException(detail='Too many pending password operations',
+                                              retry_after=self.retry_after)
+        return await self._run(func, *args)
+
+    async def hash_password(self, password: str) -> str:
+        return await self._submit(ProcessPassword.hash_password, password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(ProcessPassword.verify_password, password, hashed_password)
+
+    async def hash_passwords(self, passwords: list[str]) -> list[str]:
+        slots = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                return await self._run(ProcessPassword.hash_password, password)
+
+        return await asyncio.gather(*[hash_one(password) for password in passwords])
+
+
+password_hasher = PasswordHasher()
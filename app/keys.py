@@ -0,0 +1,230 @@
+import json
+import time
+import base64
+import hashlib
+
+from datetime import timedelta
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+from jose import jwk, jwt
+from jose.exceptions import JWTError, ExpiredSignatureError
+
+from app.config import AppSettings, JWTKeyConfig
+from app.constants import TokenType, JWTBackend
+
+CRYPTOGRAPHY_ALGORITHMS = ('EdDSA', 'ES256')
+PUBLIC_JWK_MEMBERS = ('kty', 'crv', 'n', 'e', 'x', 'y')
+
+
+def key_fingerprint(material: str) -> str:
+    return base64.urlsafe_b64encode(hashlib.sha256(material.encode()).digest()[:12]).decode()
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class SigningBackend:
+    symmetric = False
+
+    def __init__(self, algorithm: str, signing_key: str | None, verifying_key: str | None):
+        self.algorithm = algorithm
+
+    @property
+    def can_sign(self) -> bool:
+        raise NotImplementedError
+
+    def encode(self, claims: dict, headers: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        raise NotImplementedError
+
+    def public_jwk(self) -> dict:
+        raise NotImplementedError
+
+
+class JoseBackend(SigningBackend):
+    def __init__(self, algorithm: str, signing_key: str | None, verifying_key: str | None):
+        super().__init__(algorithm, signing_key, verifying_key)
+        self.symmetric = algorithm.startswith('HS')
+        self.signing_key = jwk.construct(signing_key, algorithm) if signing_key else None
+        if verifying_key:
+            self.verifying_key = jwk.construct(verifying_key, algorithm)
+        else:
+            self.verifying_key = self.signing_key
+        if not self.symmetric and not self.verifying_key.is_public():
+            self.verifying_key = self.verifying_key.public_key()
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+    def encode(self, claims: dict, headers: dict) -> str:
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        return jwt.decode(token, self.verifying_key, algorithms=[self.algorithm])
+
+    def public_jwk(self) -> dict:
+        return {name: value for name, value in self.verifying_key.to_dict().items() if name in PUBLIC_JWK_MEMBERS}
+
+
+class CryptographyBackend(SigningBackend):
+    def __init__(self, algorithm: str, signing_key: str | None, verifying_key: str | None):
+        super().__init__(algorithm, signing_key, verifying_key)
+        if algorithm not in CRYPTOGRAPHY_ALGORITHMS:
+            raise ValueError(f'The cryptography backend does not support {algorithm}')
+        self.signing_key = serialization.load_pem_private_key(signing_key.encode(), None) if signing_key else None
+        if verifying_key:
+            self.verifying_key = serialization.load_pem_public_key(verifying_key.encode())
+        else:
+            self.verifying_key = self.signing_key.public_key()
+        self._header_cache = {}
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self.algorithm == 'EdDSA':
+            return self.signing_key.sign(signing_input)
+        r, s = decode_dss_signature(self.signing_key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+
+    def _verify(self, signature: bytes, signing_input: bytes):
+        if self.algorithm == 'EdDSA':
+            return self.verifying_key.verify(signature, signing_input)
+        if len(signature) != 64:
+            raise InvalidSignature()
+        der = encode_dss_signature(int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:], 'big'))
+        self.verifying_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+
+    def encode(self, claims: dict, headers: dict) -> str:
+        header_key = tuple(sorted(headers.items()))
+        encoded_header = self._header_cache.get(header_key)
+        if encoded_header is None:
+            header = {'alg': self.algorithm, 'typ': 'JWT', **headers}
+            encoded_header = self._header_cache[header_key] = b64url_encode(
+                json.dumps(header, separators=(',', ':')).encode()
+            )
+        signing_input = encoded_header + b'.' + b64url_encode(json.dumps(claims, separators=(',', ':')).encode())
+        return (signing_input + b'.' + b64url_encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            signing_input, signature = token.encode().rsplit(b'.', 1)
+            encoded_header, encoded_claims = signing_input.split(b'.')
+            if json.loads(b64url_decode(encoded_header)).get('alg') != self.algorithm:
+                raise JWTError('The specified alg value is not allowed')
+            self._verify(b64url_decode(signature), signing_input)
+            claims = json.loads(b64url_decode(encoded_claims))
+        except InvalidSignature:
+            raise JWTError('Signature verification failed.')
+        except (ValueError, TypeError):
+            raise JWTError('Error decoding token')
+        if 'exp' in claims and float(claims['exp']) < time.time():
+            raise ExpiredSignatureError('Signature has expired.')
+        return claims
+
+    def public_jwk(self) -> dict:
+        if self.algorithm == 'EdDSA':
+            raw = self.verifying_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            return {'kty': 'OKP', 'crv': 'Ed25519', 'x': b64url_encode(raw).decode()}
+        numbers = self.verifying_key.public_numbers()
+        return {'kty': 'EC', 'crv': 'P-256',
+                'x': b64url_encode(numbers.x.to_bytes(32, 'big')).decode(),
+                'y': b64url_encode(numbers.y.to_bytes(32, 'big')).decode()}
+
+
+SIGNING_BACKENDS = {
+    JWTBackend.JOSE: JoseBackend,
+    JWTBackend.CRYPTOGRAPHY: CryptographyBackend,
+}
+
+
+class JWTKey:
+    def __init__(self, key_config: JWTKeyConfig):
+        if not key_config.signing_key and not key_config.verifying_key:
+            raise ValueError(f'JWT key {key_config.kid} has no key material')
+        backend = key_config.backend or (JWTBackend.CRYPTOGRAPHY if key_config.algorithm in CRYPTOGRAPHY_ALGORITHMS
+                                         else JWTBackend.JOSE)
+        self.kid = key_config.kid
+        self.algorithm = key_config.algorithm
+        self.backend: SigningBackend = SIGNING_BACKENDS[backend](key_config.algorithm, key_config.signing_key,
+                                                                 key_config.verifying_key)
+        self.active_from = key_config.active_from.timestamp() if key_config.active_from else float('-inf')
+        self.retire_at = key_config.retire_at.timestamp() if key_config.retire_at else float('inf')
+
+    def can_sign(self, now: float) -> bool:
+        return self.backend.can_sign and self.active_from <= now < self.retire_at
+
+    def can_verify(self, now: float, overlap: float) -> bool:
+        return now < self.retire_at + overlap
+
+    def to_jwk(self) -> dict:
+        return {**self.backend.public_jwk(), 'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'}
+
+
+class KeyRing:
+    def __init__(self, keys: list[JWTKey], lifetime: timedelta, default_kid: str | None = None):
+        if not keys:
+            raise ValueError('A key ring needs at least one key')
+        self.keys = sorted(keys, key=lambda key: key.active_from)
+        self.lifetime = lifetime
+        self.overlap = lifetime.total_seconds()
+        self.default_kid = default_kid
+        self._by_kid = {key.kid: key for key in self.keys}
+
+    @classmethod
+    def from_config(cls, keys: list[JWTKeyConfig], lifetime: timedelta,
+                    legacy_key: str | None, legacy_algorithm: str | None):
+        if keys:
+            return cls([JWTKey(key) for key in keys], lifetime)
+        if not legacy_key or not legacy_algorithm:
+            raise ValueError('Either a key list or a single key and algorithm must be configured')
+        kid = key_fingerprint(legacy_key)
+        legacy = JWTKeyConfig(kid=kid, algorithm=legacy_algorithm, signing_key=legacy_key, backend=JWTBackend.JOSE)
+        return cls([JWTKey(legacy)], lifetime, default_kid=kid)
+
+    def signing_key(self) -> JWTKey:
+        now = time.time()
+        for key in reversed(self.keys):
+            if key.can_sign(now):
+                return key
+        raise RuntimeError('No active JWT signing key')
+
+    def verification_key(self, kid: str | None) -> JWTKey | None:
+        key = self._by_kid.get(kid or self.default_kid)
+        if key is None or not key.can_verify(time.time(), self.overlap):
+            return None
+        return key
+
+    def jwks(self) -> dict:
+        now = time.time()
+        return {'keys': [key.to_jwk() for key in self.keys
+                         if not key.backend.symmetric and key.can_verify(now, self.overlap)]}
+
+
+def build_keyrings(settings: AppSettings) -> dict[TokenType, KeyRing]:
+    return {
+        TokenType.ACCESS: KeyRing.from_config(settings.JWT_ACCESS_KEYS,
+                                              timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_IN),
+                                              settings.JWT_PUBLIC_KEY, settings.JWT_ALGORITHM),
+        TokenType.REFRESH: KeyRing.from_config(settings.JWT_REFRESH_KEYS,
+                                               timedelta(minutes=settings.REFRESH_TOKEN_EXPIRES_IN),
+                                               settings.JWT_PRIVATE_KEY, settings.JWT_ALGORITHM),
+        TokenType.VERIFICATION: KeyRing.from_config([],
+                                                    timedelta(minutes=settings.VERIFICATION_TOKEN_EXPIRES_IN),
+                                                    settings.VERIFICATION_SECRET_KEY, settings.VERIFICATION_ALGORITHM),
+    }
+
+
+keyrings = {}
@@ -0,0 +1,76 @@
+import json
+import queue
+import random
+import logging
+
+from datetime import datetime, timezone
+from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+
+RECORD_FIELDS = ('request_id', 'method', 'path', 'route', 'status_code', 'duration_ms')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'message': record.getMessage()}
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class SuccessSampler(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        status_code = getattr(record, 'status_code', None)
+        if status_code is None or status_code >= 400 or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
+
+
+class LogPipeline:
+    def __init__(self):
+        self.listener = None
+
+    def configure(self, log_config):
+        config = log_config.dict()
+        config['loggers'][log_config.LOGGER_NAME]['level'] = log_config.LOG_LEVEL
+        if log_config.LOG_JSON:
+            config['handlers']['default']['formatter'] = 'json'
+        dictConfig(config)
+        logger = logging.getLogger(log_config.LOGGER_NAME)
+        sampler = SuccessSampler(log_config.LOG_SUCCESS_SAMPLE_RATE)
+        if not log_config.LOG_QUEUE:
+            for handler in logger.handlers:
+                handler.addFilter(sampler)
+            return
+
+        handlers = list(logger.handlers)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(sampler)
+        logger.addHandler(queue_handler)
+        self.listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.start()
+
+    def start(self):
+        if self.listener is not None and self.listener._thread is None:
+            self.listener.start()
+
+    def stop(self):
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+
+log_pipeline = LogPipeline()
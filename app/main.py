@@ -1,66 +1,121 @@
+import asyncio
 import logging
 
-from logging.config import dictConfig
+from contextlib import asynccontextmanager, AsyncExitStack
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.utils import get_openapi
-from fastapi.exceptions import RequestValidationError
 
-from app.config import config, LogConfig
-from app.routers import user_router, auth_router, settings_router
-from app.middlewares import LogRequestsMiddleware, RateLimitMiddleware, ExceptionHandlingMiddleware, RequestIDMiddleware
-from app.exception_handlers import validation_exception_handler
+from app.config import AppSettings, LogConfig
 
-dictConfig(LogConfig().dict())
 logger = logging.getLogger("app")
 
-middlewares = [
-    (RequestIDMiddleware, {}),
-    (RateLimitMiddleware, {"limit": config.RATE_LIMIT, "interval": config.RATE_LIMIT_INTERVAL}),
-    (LogRequestsMiddleware, {}),
-    (ExceptionHandlingMiddleware, {})
-]
 
-exception_handlers = {RequestValidationError: validation_exception_handler}
-
-app = FastAPI(middleware=middlewares,
-              exception_handlers=exception_handlers)
-
-origins = [
-    config.CLIENT_ORIGIN,
-]
+def create_app(settings: AppSettings | None = None, log_config: LogConfig | None = None) -> FastAPI:
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import PlainTextResponse
+    from fastapi.openapi.utils import get_openapi
+    from fastapi.exceptions import RequestValidationError
+
+    from app.routers import user_router, auth_router, settings_router, jwks_router
+    from app.middlewares import (LogRequestsMiddleware, RateLimitMiddleware, ExceptionHandlingMiddleware,
+                                 RequestIDMiddleware, MetricsMiddleware)
+    from app.exception_handlers import validation_exception_handler
+    from app.controllers import UserController, SettingsController
+    from app.database import database
+    from app.hashing import password_hasher
+    from app.utils import configure_tokens
+    from app.schemas import password_policy
+    from app.rate_limiter import RATE_LIMITERS
+    from app.cache import caches
+    from app.email import email_delivery
+    from app.metrics import registry
+    from app.logs import log_pipeline
+
+    settings = settings or AppSettings()
+    rate_limiter = RATE_LIMITERS[settings.RATE_LIMIT_ALGORITHM](settings.RATE_LIMIT, settings.RATE_LIMIT_INTERVAL)
+    log_pipeline.configure(log_config or LogConfig())
+
+    middlewares = [
+        (MetricsMiddleware, {}),
+        (RequestIDMiddleware, {}),
+        (RateLimitMiddleware, {"limiter": rate_limiter}),
+        (LogRequestsMiddleware, {}),
+        (ExceptionHandlingMiddleware, {})
+    ]
+
+    exception_handlers = {RequestValidationError: validation_exception_handler}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with AsyncExitStack() as stack:
+            log_pipeline.start()
+            stack.callback(log_pipeline.stop)
+            configure_tokens(settings)
+            password_policy.configure(settings)
+            database.start(settings)
+            stack.push_async_callback(database.shutdown)
+            caches.bind(rate_limiter)
+            stack.callback(caches.unbind, rate_limiter)
+            stack.push_async_callback(caches.shutdown)
+            await asyncio.gather(database.warm_up(settings.DATABASE_WARMUP_CONNECTIONS,
+                                                  [UserController.warm_up, SettingsController.warm_up]),
+                                 caches.start(settings))
+            password_hasher.start(settings)
+            stack.callback(password_hasher.shutdown)
+            await email_delivery.start(settings)
+            stack.push_async_callback(email_delivery.shutdown)
+            yield
+
+    app = FastAPI(middleware=middlewares,
+                  exception_handlers=exception_handlers,
+                  lifespan=lifespan)
+    app.state.settings = settings
+
+    origins = [
+        settings.CLIENT_ORIGIN,
+    ]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    app.include_router(auth_router, prefix="/api/v1")
+    app.include_router(user_router, prefix="/api/v1")
+    app.include_router(settings_router, prefix="/api/v1")
+    app.include_router(jwks_router)
 
-app.include_router(auth_router, prefix="/api/v1")
-app.include_router(user_router, prefix="/api/v1")
-app.include_router(settings_router, prefix="/api/v1")
+    @app.get('/healthchecker')
+    async def root():
+        return {'message': 'Hello World'}
 
+    @app.get('/metrics', include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
 
-@app.get('/healthchecker')
-async def root():
-    return {'message': 'Hello World'}
+    def custom_openapi():
+        if app.openapi_schema:
+            return app.openapi_schema
 
+        openapi_schema = get_openapi(
+            title="Documentation",
+            version="1.0.0",
+            description="Docs for Authentication App",
+            routes=app.routes
+        )
 
-def custom_openapi():
-    if app.openapi_schema:
+        app.openapi_schema = openapi_schema
         return app.openapi_schema
 
-    openapi_schema = get_openapi(
-        title="Documentation",
-        version="1.0.0",
-        description="Docs for Authentication App",
-        routes=app.routes
-    )
-
-    app.openapi_schema = openapi_schema
-    return app.openapi_schema
+    app.openapi = custom_openapi
+    return app
 
 
-app.openapi = custom_openapi
+def __getattr__(name: str):
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
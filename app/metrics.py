@@ -0,0 +1,82 @@
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._bounds = tuple(f'le="{bound}"' for bound in buckets) + ('le="+Inf"',)
+        self._series = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self._bounds, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(self.labels, labels, bound)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labels, labels)} {total}')
+            lines.append(f'{self.name}_count{format_labels(self.labels, labels)} {cumulative}')
+        return lines
+
+
+class GaugeCallback:
+    def __init__(self, name: str, description: str, callback, metric_type: str = 'gauge'):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self.metric_type = metric_type
+
+    def render(self) -> list[str]:
+        return [f'# HELP {self.name} {self.description}',
+                f'# TYPE {self.name} {self.metric_type}',
+                f'{self.name} {self.callback()}']
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template', ('method', 'route', 'status')))
+db_statement_duration = registry.register(Histogram(
+    'db_statement_duration_seconds', 'SQL statement latency', ('operation',)))
+redis_command_duration = registry.register(Histogram(
+    'redis_command_duration_seconds', 'Redis command latency', ('command',)))
+password_hash_queue_duration = registry.register(Histogram(
+    'password_hash_queue_seconds', 'Time bcrypt work waits for a worker process', ('operation',)))
+password_hash_duration = registry.register(Histogram(
+    'password_hash_duration_seconds', 'Time bcrypt work runs in a worker process', ('operation',)))
+jwt_duration = registry.register(Histogram(
+    'jwt_duration_seconds', 'JWT sign and verify time', ('operation', 'token_type')))
@@ -2,3 +2,4 @@ from .log_requests import LogRequestsMiddleware
 from .rate_limit import RateLimitMiddleware
 from .exception_handling import ExceptionHandlingMiddleware
 from .request_id import RequestIDMiddleware
+from .metrics import MetricsMiddleware
@@ -1,15 +1,33 @@
-from fastapi import Request, HTTPException
+from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from starlette.middleware.base import BaseHTTPMiddleware
 
+class ExceptionHandlingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        response_started = False
+
+        async def send_tracking_start(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-class ExceptionHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_tracking_start)
         except HTTPException as exc:
-            return JSONResponse(content={"error": str(exc.detail)}, status_code=exc.status_code)
+            if response_started:
+                raise
+            response = JSONResponse(content={"error": str(exc.detail)}, status_code=exc.status_code)
+            await response(scope, receive, send)
         except Exception as exc:
-            return JSONResponse(content={"error": f"Internal Server Error: {exc.args[0]}"}, status_code=500)
+            if response_started:
+                raise
+            response = JSONResponse(content={"error": f"Internal Server Error: {exc.args[0]}"}, status_code=500)
+            await response(scope, receive, send)
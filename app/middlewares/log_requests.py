@@ -1,23 +1,42 @@
 import time
 import logging
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.middlewares.metrics import route_template
 
-class LogRequestsMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
+logger = logging.getLogger(__name__)
 
-    async def dispatch(self, request: Request, call_next):
-        req_id = request.state.request_id
-        logging.info(f"rid={req_id} Start Request Path={request.url.path}")
 
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
+class LogRequestsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        formatted_process_time = '{0:.2f}'.format(process_time)
-        logging.info(f"rid={req_id} | completed_in={formatted_process_time}ms | status_code={response.status_code}")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        return response
+        req_id = scope["state"]["request_id"]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("rid=%s Start Request Path=%s", req_id, scope["path"],
+                         extra={"request_id": req_id, "method": scope["method"], "path": scope["path"]})
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            level = logging.ERROR if status_code >= 500 else logging.INFO
+            if logger.isEnabledFor(level):
+                process_time = round((time.perf_counter() - start_time) * 1000, 2)
+                logger.log(level, "rid=%s | completed_in=%.2fms | status_code=%s", req_id, process_time, status_code,
+                           extra={"request_id": req_id, "method": scope["method"], "path": scope["path"],
+                                  "route": route_template(scope), "status_code": status_code,
+                                  "duration_ms": process_time})
@@ -0,0 +1,45 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import http_request_duration
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+route_templates = {}
+
+
+def route_template(scope: Scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = route_templates.get(endpoint)
+    if template is None:
+        route_templates.update({route.endpoint: route.path for route in scope["app"].routes
+                                if hasattr(route, "endpoint")})
+        template = route_templates.get(endpoint, UNMATCHED_ROUTE)
+    return template
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(time.perf_counter() - start_time,
+                                          scope["method"], route_template(scope), status_code)
@@ -1,30 +1,38 @@
 import logging
 
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from datetime import timedelta
+from app.rate_limiter import RateLimiter
 
-from app.cache import redis_client
+logger = logging.getLogger(__name__)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, limit, interval):
-        super().__init__(app)
-        self.limit = limit
-        self.interval = timedelta(seconds=interval)
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
 
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        client_ip = scope["client"][0] if scope.get("client") else None
         key = f"rate_limit:{client_ip}"
-        logging.info(f"RateLimitMiddleware: request_id={request.state.request_id}")
-        current = await redis_client.get(key)
+        logger.debug("RateLimitMiddleware: request_id=%s", scope['state']['request_id'])
+        result = await self.limiter.hit(key)
+
+        if not result.allowed:
+            response = JSONResponse(content={"detail": "Too Many Requests"},
+                                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                    headers={**result.headers, "Retry-After": str(result.reset_after)})
+            return await response(scope, receive, send)
 
-        if current is None:
-            await redis_client.setex(key, self.interval, 1)
-        elif int(current) >= self.limit:
-            return HTTPException(status_code=429, detail="Too Many Requests")
-        else:
-            await redis_client.incr(key)
+        async def send_with_rate_limit_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(result.headers)
+            await send(message)
 
-        return await call_next(request)
+        await self.app(scope, receive, send_with_rate_limit_headers)
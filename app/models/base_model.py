@@ -1,4 +1,5 @@
-from sqlalchemy import TIMESTAMP, Column, text
+from sqlalchemy import TIMESTAMP, Column, Index, text, func
+from sqlalchemy.orm import declared_attr
 
 from app.database import Base
 
@@ -6,10 +7,18 @@ from app.database import Base
 class BaseModel(Base):
     __abstract__ = True
 
+    @declared_attr
+    def __table_args__(cls):
+        return tuple(cls.indexes())
+
+    @classmethod
+    def indexes(cls) -> list[Index]:
+        return [Index(f'ix_{cls.__tablename__}_created_at_id', 'created_at', 'id')]
+
     created_at = Column(TIMESTAMP(timezone=True),
                         nullable=False, server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True),
-                        nullable=False, server_default=text('now()'))
+                        nullable=False, server_default=text('now()'), onupdate=func.now())
 
     def to_dict(self) -> dict:
         data = {}
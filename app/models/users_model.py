@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, Boolean, ForeignKey
+from sqlalchemy import Column, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import Mapped, declared_attr, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -20,6 +20,15 @@ class Users(BaseModel):
     verified: Mapped[bool] = Column(Boolean, nullable=False, server_default='False')
     role: Mapped[RoleType] = Column(String, server_default=RoleType.USER, nullable=False)
 
+    @classmethod
+    def indexes(cls) -> list[Index]:
+        return [*super().indexes(),
+                Index('ix_users_username_trgm', 'username',
+                      postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+                Index('ix_users_email_trgm', 'email',
+                      postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+                Index('ix_users_role', 'role')]
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name!r})"
 
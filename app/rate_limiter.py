@@ -0,0 +1,128 @@
+import math
+import time
+import uuid
+
+from typing import NamedTuple
+
+from app.cache_backends import CacheBackend, CacheScript
+from app.constants import RateLimitAlgorithm
+from app.metrics import redis_command_duration
+
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, limit - count - 1, window}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, 0, tonumber(oldest[2]) + window - now}
+"""
+
+
+async def sliding_window(backend: CacheBackend, keys: list, args: list) -> list:
+    now, window, limit = float(args[0]), float(args[1]), int(args[2])
+    await backend.zremrangebyscore(keys[0], '-inf', now - window)
+    count = await backend.zcard(keys[0])
+    if count < limit:
+        await backend.zadd(keys[0], {args[3]: now})
+        await backend.pexpire(keys[0], window)
+        return [1, limit - count - 1, window]
+    (_, oldest), = await backend.zrange(keys[0], 0, 0, withscores=True)
+    return [0, 0, oldest + window - now]
+
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), math.ceil((1 - (tokens % 1)) / rate)}
+"""
+
+
+async def token_bucket(backend: CacheBackend, keys: list, args: list) -> list:
+    now, capacity, rate = float(args[0]), float(args[1]), float(args[2])
+    tokens, ts = await backend.hmget(keys[0], ['tokens', 'ts'])
+    tokens = float(tokens) if tokens is not None else capacity
+    ts = float(ts) if ts is not None else now
+    tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+    allowed = 0
+    if tokens >= 1:
+        tokens -= 1
+        allowed = 1
+    await backend.hset(keys[0], mapping={'tokens': tokens, 'ts': now})
+    await backend.pexpire(keys[0], math.ceil(capacity / rate))
+    return [allowed, math.floor(tokens), math.ceil((1 - tokens % 1) / rate)]
+
+
+SLIDING_WINDOW_SCRIPT = CacheScript(SLIDING_WINDOW_LUA, sliding_window)
+TOKEN_BUCKET_SCRIPT = CacheScript(TOKEN_BUCKET_LUA, token_bucket)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int
+
+    @property
+    def headers(self) -> dict:
+        return {'X-RateLimit-Limit': str(self.limit),
+                'X-RateLimit-Remaining': str(self.remaining),
+                'X-RateLimit-Reset': str(self.reset_after)}
+
+
+class RateLimiter:
+    script = None
+    client: CacheBackend = None
+
+    def __init__(self, limit: int, interval: int):
+        self.limit = limit
+        self.interval_ms = interval * 1000
+
+    def script_args(self, now_ms: int) -> list:
+        raise NotImplementedError
+
+    async def hit(self, key: str) -> RateLimitResult:
+        now_ms = int(time.time() * 1000)
+        start = time.perf_counter()
+        allowed, remaining, reset_ms = await self.client.run_script(self.script, [key], self.script_args(now_ms))
+        redis_command_duration.observe(time.perf_counter() - start, 'rate_limit')
+        return RateLimitResult(allowed=bool(allowed),
+                               limit=self.limit,
+                               remaining=int(remaining),
+                               reset_after=math.ceil(int(reset_ms) / 1000))
+
+
+class SlidingWindowRateLimiter(RateLimiter):
+    script = SLIDING_WINDOW_SCRIPT
+
+    def script_args(self, now_ms: int) -> list:
+        return [now_ms, self.interval_ms, self.limit, f'{now_ms}:{uuid.uuid4().hex}']
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    script = TOKEN_BUCKET_SCRIPT
+
+    def script_args(self, now_ms: int) -> list:
+        return [now_ms, self.limit, self.limit / self.interval_ms]
+
+
+RATE_LIMITERS = {
+    RateLimitAlgorithm.SLIDING_WINDOW: SlidingWindowRateLimiter,
+    RateLimitAlgorithm.TOKEN_BUCKET: TokenBucketRateLimiter,
+}
@@ -0,0 +1,32 @@
+import asyncio
+
+from aioredis import Redis, ConnectionPool, RedisError
+
+from app.cache_backends import CacheBackend, CacheScript
+
+
+class RedisBackend(Redis, CacheBackend):
+    errors = (RedisError, OSError)
+
+    def __init__(self, host: str, port: int, password: str | None, max_connections: int):
+        super().__init__(connection_pool=ConnectionPool(host=host, port=port, password=password,
+                                                        max_connections=max_connections, decode_responses=True))
+        self._scripts = {}
+
+    async def run_script(self, script: CacheScript, keys: list, args: list):
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.register_script(script.lua)
+        return await registered(keys=keys, args=args)
+
+    async def warm_up(self, connections: int) -> int:
+        pool = self.connection_pool
+        connections = min(connections, pool.max_connections)
+        results = await asyncio.gather(*(pool.get_connection('PING') for _ in range(connections)),
+                                       return_exceptions=True)
+        opened = [result for result in results if not isinstance(result, BaseException)]
+        await asyncio.gather(*(pool.release(connection) for connection in opened))
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(opened)
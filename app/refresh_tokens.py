@@ -0,0 +1,70 @@
+import time
+
+from enum import IntEnum
+
+from app.cache import caches
+from app.config import AppSettings
+from app.cache_backends import CacheBackend, CacheScript
+from app.constants import REFRESH_FAMILY_KEY
+from app.metrics import redis_command_duration
+
+ROTATE_LUA = """
+local state = redis.call('HMGET', KEYS[1], 'current', 'revoked')
+if state[2] then
+    return 0
+end
+if state[1] and state[1] ~= ARGV[1] then
+    redis.call('HSET', KEYS[1], 'revoked', '1')
+    return -1
+end
+redis.call('HSET', KEYS[1], 'current', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+async def rotate(backend: CacheBackend, keys: list, args: list) -> int:
+    current, revoked = await backend.hmget(keys[0], ['current', 'revoked'])
+    if revoked:
+        return 0
+    if current and current != args[0]:
+        await backend.hset(keys[0], 'revoked', '1')
+        return -1
+    await backend.hset(keys[0], 'current', args[1])
+    await backend.pexpire(keys[0], args[2])
+    return 1
+
+
+ROTATE_SCRIPT = CacheScript(ROTATE_LUA, rotate)
+
+
+class Rotation(IntEnum):
+    REUSED = -1
+    REVOKED = 0
+    ROTATED = 1
+
+
+class RefreshTokenFamilies:
+    client: CacheBackend = None
+
+    def __init__(self):
+        self.ttl_ms = None
+
+    def configure(self, settings: AppSettings):
+        self.ttl_ms = settings.REFRESH_TOKEN_EXPIRES_IN * 60 * 1000
+
+    async def rotate(self, family_id: str, presented_jti: str, new_jti: str) -> Rotation:
+        start = time.perf_counter()
+        result = await self.client.run_script(ROTATE_SCRIPT, [REFRESH_FAMILY_KEY.format(family_id)],
+                                              [presented_jti, new_jti, self.ttl_ms])
+        redis_command_duration.observe(time.perf_counter() - start, 'refresh_rotate')
+        return Rotation(int(result))
+
+    async def revoke(self, family_id: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(REFRESH_FAMILY_KEY.format(family_id), 'revoked', '1')
+            pipe.pexpire(REFRESH_FAMILY_KEY.format(family_id), self.ttl_ms)
+            await pipe.execute()
+
+
+refresh_token_families = caches.bind(RefreshTokenFamilies())
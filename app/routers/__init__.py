@@ -1,3 +1,4 @@
 from .auth import router as auth_router
 from .settings import router as settings_router
 from .user import router as user_router
+from .jwks import router as jwks_router
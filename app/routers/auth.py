@@ -1,46 +1,51 @@
-from fastapi import BackgroundTasks, APIRouter, status, Depends, Path
+import uuid
+
+from fastapi import APIRouter, status, Depends, Path
 from fastapi.security import OAuth2PasswordRequestForm
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.utils import ProcessToken, VERIFICATION_TOKEN_EXPIRES_IN, ACCESS_TOKEN_EXPIRES_IN
-from app.cache import redis_client
+from app.database import get_db, after_commit
+from app.unit_of_work import UnitOfWorkRoute
+from app.utils import ProcessToken
+from app.cache import deny_list
+from app.refresh_tokens import refresh_token_families, Rotation
 from app.email import Email
 from app.controllers import UserController
-from app.dependencies import check_token_revocation
+from app.dependencies import AuthContext, access_token_context, refresh_token_context, get_current_user
+from app.models import Users
+from app.serializers import user_serializer
 from app.schemas import RegisterUserSchema, ResponseUserSchema, TokensResponse, StatusResponse
-from app.oauth2 import oauth2_scheme
-from app.constants import REVOKED, TokenType, VERIFICATION_URL
+from app.constants import TokenType, VERIFICATION_URL
 from app.exceptions import ConflictException, ForbiddenException, UnauthorizedException, BadRequestException
 
 
-router = APIRouter(prefix="/auth", tags=['Authentication'])
+router = APIRouter(prefix="/auth", tags=['Authentication'], route_class=UnitOfWorkRoute)
 
 
 @router.post('/register', status_code=status.HTTP_201_CREATED,
              response_model=ResponseUserSchema)
 async def register_user(payload: RegisterUserSchema,
-                        background_tasks: BackgroundTasks,
                         db: AsyncSession = Depends(get_db)):
-    user = await UserController.get_by_username(db, payload.username)
-    if user:
+    if await UserController.account_exists(db, payload.username, payload.email):
         raise ConflictException(detail='Account already exist')
-
-    payload = UserController.transform_payload(payload)
+    payload = await UserController.transform_payload(payload)
     new_user = await UserController.create(db, payload.dict())
+    if not new_user:
+        raise ConflictException(detail='Account already exist')
+
     user_info = {'sub': new_user.username, 'user_id': str(new_user.id), 'user_role': new_user.role}
 
     token_payload = ProcessToken.create_token_payload(user_info,
-                                                      VERIFICATION_TOKEN_EXPIRES_IN,
+                                                      ProcessToken.expires_in(TokenType.VERIFICATION),
                                                       TokenType.VERIFICATION)
     token = ProcessToken.create_token(token_payload, TokenType.VERIFICATION)
 
     verification_url = VERIFICATION_URL.format(token=token)
     email = Email(payload.name, verification_url, [payload.email])
-    background_tasks.add_task(email.send_verification_code)
+    after_commit(db, email.send_verification_code)
 
-    return new_user
+    return user_serializer.response(new_user, status.HTTP_201_CREATED)
 
 
 @router.get('/verify_email/{token}')
@@ -73,60 +78,56 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(),
     access_and_refresh_tokens = ProcessToken.create_access_and_refresh_tokens(user_info)
 
     return {**access_and_refresh_tokens,
-            'expires_in': ACCESS_TOKEN_EXPIRES_IN.total_seconds(),
+            'expires_in': ProcessToken.expires_in(TokenType.ACCESS).total_seconds(),
             'token_type': 'Bearer'}
 
 
 @router.post('/token/refresh', status_code=status.HTTP_200_OK,
-             response_model=TokensResponse,
-             dependencies=[Depends(check_token_revocation(TokenType.REFRESH))])
-async def refresh_access_token(db: AsyncSession = Depends(get_db),
-                               refresh_token: oauth2_scheme = Depends()):
-    token_data = ProcessToken.validate_token(refresh_token, token_type=TokenType.REFRESH)
-
-    user = await UserController.get(db, str(token_data.user_id))
+             response_model=TokensResponse)
+async def refresh_access_token(context: AuthContext = Depends(refresh_token_context)):
+    family_id = context.token_data.fid or context.token_data.jti
+    new_jti = str(uuid.uuid4())
+    rotation = await refresh_token_families.rotate(family_id, context.token_data.jti, new_jti)
+    if rotation == Rotation.REUSED:
+        raise UnauthorizedException(detail='Refresh token reuse detected')
+    if rotation == Rotation.REVOKED:
+        raise UnauthorizedException(detail='Token has been revoked')
+
+    user = await context.get_user()
     if not user:
         raise UnauthorizedException(detail='The user belonging to this token no longer exist')
 
     user_info = {'sub': user.username, 'user_id': str(user.id), 'user_role': user.role}
-    access_and_refresh_tokens = ProcessToken.create_access_and_refresh_tokens(user_info)
+    access_and_refresh_tokens = ProcessToken.create_access_and_refresh_tokens(user_info, family_id, new_jti)
 
     return {**access_and_refresh_tokens,
-            'expires_in': ACCESS_TOKEN_EXPIRES_IN.total_seconds(),
+            'expires_in': ProcessToken.expires_in(TokenType.ACCESS).total_seconds(),
             'token_type': 'Bearer'}
 
 
 @router.get('/token/verify',
             status_code=status.HTTP_200_OK,
-            response_model=ResponseUserSchema,
-            dependencies=[Depends(check_token_revocation(TokenType.ACCESS))])
-async def get_me(db: AsyncSession = Depends(get_db),
-                 token: oauth2_scheme = Depends()):
-    token_data = ProcessToken.validate_token(token, token_type=TokenType.ACCESS)
-
-    user = await UserController.get(db, str(token_data.user_id))
+            response_model=ResponseUserSchema)
+async def get_me(user: Users = Depends(get_current_user)):
     if not user:
         raise UnauthorizedException(detail='The user belonging to this token no longer exist')
-    return user
+    return user_serializer.response(user)
 
 
 @router.delete('/revoke/access',
                status_code=status.HTTP_200_OK,
-               response_model=StatusResponse,
-               dependencies=[Depends(check_token_revocation(TokenType.ACCESS))])
-async def access_revoke(token: oauth2_scheme = Depends()):
-    token_data = ProcessToken.validate_token(token, token_type=TokenType.ACCESS)
-    jti = token_data.jti
-    await redis_client.setex(jti, ACCESS_TOKEN_EXPIRES_IN, REVOKED)
+               response_model=StatusResponse)
+async def access_revoke(context: AuthContext = Depends(access_token_context)):
+    jti = context.token_data.jti
+    await deny_list.revoke(jti, ProcessToken.expires_in(TokenType.ACCESS))
     return {'status': 'success', 'message': 'Access token revoked'}
 
 
 @router.delete('/revoke/refresh',
                status_code=status.HTTP_200_OK,
-               response_model=StatusResponse,
-               dependencies=[Depends(check_token_revocation(TokenType.REFRESH))])
-async def refresh_revoke(token: oauth2_scheme = Depends()):
-    token_data = ProcessToken.validate_token(token, token_type=TokenType.REFRESH)
-    jti = token_data.jti
-    await redis_client.setex(jti, ACCESS_TOKEN_EXPIRES_IN, REVOKED)
+               response_model=StatusResponse)
+async def refresh_revoke(context: AuthContext = Depends(refresh_token_context)):
+    jti = context.token_data.jti
+    await deny_list.revoke(jti, ProcessToken.expires_in(TokenType.REFRESH))
+    await refresh_token_families.revoke(context.token_data.fid or jti)
     return {'status': 'success', 'message': 'Refresh token revoked'}
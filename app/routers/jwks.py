@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.constants import TokenType
+from app.keys import keyrings
+
+router = APIRouter(prefix='/.well-known', tags=['Keys'])
+
+
+@router.get('/jwks.json')
+async def get_jwks(request: Request):
+    return JSONResponse(content=keyrings[TokenType.ACCESS].jwks(),
+                        headers={'Cache-Control': f'public, max-age={request.app.state.settings.JWKS_MAX_AGE}'})
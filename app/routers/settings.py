@@ -1,34 +1,66 @@
-from fastapi import Path, status, APIRouter, Depends
+from fastapi import Path, Query, status, APIRouter, Depends, Request, Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas import ResponseSettingsSchema, CreateSettingsSchema, UpdateSettingsSchema, StatusResponse
+from app.unit_of_work import UnitOfWorkRoute
+from app.schemas import ResponseSettingsSchema, CreateSettingsSchema, UpdateSettingsSchema, StatusResponse, PageResponse
 from app.controllers import SettingsController
-from app.dependencies import check_token_revocation, get_current_user
+from app.dependencies import AuthContext, access_token_context, get_current_user
 from app.roles import allow_manage_everything
-from app.models import Users
-from app.constants import TokenType
-from app.exceptions import NotFoundException, ConflictException
+from app.models import Users, Settings
+from app.utils import ProcessCursor, ProcessETag
+from app.cache import settings_etags
+from app.serializers import settings_serializer
+from app.constants import PAGE_SIZE, MAX_PAGE_SIZE
+from app.exceptions import NotFoundException, ConflictException, PreconditionFailedException
 
 router = APIRouter(prefix='/users/settings',
                    tags=['Settings'],
-                   dependencies=[Depends(check_token_revocation(TokenType.ACCESS))])
+                   route_class=UnitOfWorkRoute,
+                   dependencies=[Depends(access_token_context)])
+
+
+def settings_etag(settings: Settings) -> str:
+    return ProcessETag.make_etag(settings.id, settings.updated_at)
+
+
+async def update_unless_modified(request: Request, db: AsyncSession, settings: Settings,
+                                 payload: UpdateSettingsSchema) -> Response:
+    if_match = request.headers.get('if-match')
+    if if_match and not ProcessETag.matches(if_match, settings_etag(settings)):
+        raise PreconditionFailedException(detail='Settings were modified by another request')
+    updated_settings = await SettingsController.update(db, settings, payload.dict(), if_unmodified=bool(if_match))
+    if not updated_settings:
+        raise PreconditionFailedException(detail='Settings were modified by another request')
+    return settings_serializer.response(updated_settings, headers={'ETag': settings_etag(updated_settings)})
 
 
 @router.get('/', status_code=status.HTTP_200_OK,
             response_model=ResponseSettingsSchema)
-async def get_my_settings(db: AsyncSession = Depends(get_db),
-                          user: Users = Depends(get_current_user)):
-    if not user:
-        raise NotFoundException(detail=f'User not found')
-    settings = await SettingsController.get_by_user_id(db, user.id)
-    return settings
+async def get_my_settings(request: Request,
+                          db: AsyncSession = Depends(get_db),
+                          context: AuthContext = Depends(access_token_context)):
+    user_id = context.token_data.user_id
+    cached_etag, version = await settings_etags.lookup(user_id)
+    if_none_match = request.headers.get('if-none-match')
+    if cached_etag and if_none_match and ProcessETag.matches(if_none_match, cached_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={'ETag': cached_etag, 'Cache-Control': 'private, no-cache'})
+
+    settings = await SettingsController.get_by_user_id(db, user_id)
+    if not settings:
+        raise NotFoundException(detail='Settings does not exist')
+    etag = settings_etag(settings)
+    if cached_etag is None:
+        await settings_etags.set(user_id, etag, version)
+    return settings_serializer.response(settings, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
 
 
 @router.put('/', status_code=status.HTTP_200_OK,
             response_model=ResponseSettingsSchema)
-async def update_my_settings(payload: UpdateSettingsSchema,
+async def update_my_settings(request: Request,
+                             payload: UpdateSettingsSchema,
                              db: AsyncSession = Depends(get_db),
                              user: Users = Depends(get_current_user)):
     if not user:
@@ -36,16 +68,19 @@ async def update_my_settings(payload: UpdateSettingsSchema,
     settings = await SettingsController.get_by_user_id(db, user.id)
     if not settings:
         raise NotFoundException(detail='Settings does not exist')
-    updated_settings = await SettingsController.update(db, settings, payload.dict())
-    return updated_settings
+    return await update_unless_modified(request, db, settings, payload)
 
 
 @router.get('/all', status_code=status.HTTP_200_OK,
-            response_model=list[ResponseSettingsSchema],
+            response_model=PageResponse[ResponseSettingsSchema],
             dependencies=[Depends(allow_manage_everything)])
-async def get_all_settings(db: AsyncSession = Depends(get_db)):
-    settings = await SettingsController.all(db)
-    return settings
+async def get_all_settings(request: Request, response: Response,
+                           db: AsyncSession = Depends(get_db),
+                           limit: int = Query(default=PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                           cursor: str = Query(required=False, default=None)):
+    settings, next_cursor = await SettingsController.page(db, limit, cursor)
+    return settings_serializer.page_response(ProcessCursor.page_response(request, response, settings, next_cursor),
+                                             response)
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED,
@@ -58,20 +93,20 @@ async def create_settings(payload: CreateSettingsSchema,
         raise ConflictException(detail='Settings for this user already exist')
 
     new_settings = await SettingsController.create(db, payload.dict())
-    return new_settings
+    return settings_serializer.response(new_settings, status.HTTP_201_CREATED)
 
 
 @router.put('/{settings_id}', status_code=status.HTTP_200_OK,
             response_model=ResponseSettingsSchema,
             dependencies=[Depends(allow_manage_everything)])
-async def update_settings(payload: UpdateSettingsSchema,
+async def update_settings(request: Request,
+                          payload: UpdateSettingsSchema,
                           db: AsyncSession = Depends(get_db),
                           settings_id: str = Path()):
     settings = await SettingsController.get(db, settings_id)
     if not settings:
         raise NotFoundException(detail='Settings does not exist')
-    updated_settings = await SettingsController.update(db, settings, payload.dict())
-    return updated_settings
+    return await update_unless_modified(request, db, settings, payload)
 
 
 @router.delete('/{settings_id}', status_code=status.HTTP_200_OK,
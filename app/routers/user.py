@@ -1,56 +1,104 @@
-from fastapi import Path, Query, status, APIRouter, Depends, Request
+import json
+
+from fastapi import Path, Query, status, APIRouter, Depends, Request, Response
 
-from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.unit_of_work import UnitOfWorkRoute
 from app.roles import allow_manage_everything
-from app.schemas import ResponseUserSchema, RegisterUserSchema, UpdateUserSchema, StatusResponse
+from app.schemas import (ResponseUserSchema, RegisterUserSchema, UpdateUserSchema, StatusResponse, PageResponse,
+                         BulkImportResponse, BulkImportRowError)
 from app.controllers import UserController
-from app.dependencies import check_token_revocation
-from app.models import Users
-from app.constants import TokenType
-from app.exceptions import NotFoundException, ConflictException
+from app.dependencies import access_token_context
+from app.utils import ProcessCursor
+from app.serializers import user_serializer
+from app.cache import revocation_epochs
+from app.constants import PAGE_SIZE, MAX_PAGE_SIZE, SearchMatch, NDJSON_MEDIA_TYPE, BULK_IMPORT_BATCH_SIZE
+from app.exceptions import NotFoundException, ConflictException, BadRequestException
 
 router = APIRouter(prefix='/users',
                    tags=['Users'],
-                   dependencies=[Depends(allow_manage_everything),
-                                 Depends(check_token_revocation(TokenType.ACCESS))])
+                   route_class=UnitOfWorkRoute,
+                   dependencies=[Depends(access_token_context),
+                                 Depends(allow_manage_everything)])
 
 
 @router.get('/', status_code=status.HTTP_200_OK,
-            response_model=list[ResponseUserSchema])
-async def get_all_users(db: AsyncSession = Depends(get_db),
+            response_model=PageResponse[ResponseUserSchema])
+async def get_all_users(request: Request, response: Response,
+                        db: AsyncSession = Depends(get_db),
                         username: str = Query(required=False, default=None),
                         email: str = Query(required=False, default=None),
-                        role: str = Query(required=False, default=None)):
-    filters = []
-    if username:
-        filters.append(Users.username.ilike(f'%{username}%'))
-    if email:
-        filters.append(Users.email.ilike(f'%{email}%'))
-    if role:
-        filters.append(Users.role == role)
-
-    users = await UserController.all(db, filters)
-    if not users:
+                        role: str = Query(required=False, default=None),
+                        match: SearchMatch = Query(default=SearchMatch.CONTAINS),
+                        limit: int = Query(default=PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: str = Query(required=False, default=None)):
+    filters = UserController.search_filters(username, email, role, match)
+    users, next_cursor = await UserController.page(db, limit, cursor, filters)
+    if not users and not cursor:
         raise NotFoundException(detail=f'No users found')
-    return users
+    return user_serializer.page_response(ProcessCursor.page_response(request, response, users, next_cursor), response)
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED,
              response_model=ResponseUserSchema)
 async def create_user(payload: RegisterUserSchema,
                       db: AsyncSession = Depends(get_db)):
-    filter_by_username = (Users.username == payload.username)
-    filter_by_email = (Users.email == payload.email)
-    users = await UserController.all(db, [or_(filter_by_username, filter_by_email)])
-    if users:
+    if await UserController.account_exists(db, payload.username, payload.email):
         raise ConflictException(detail='Account already exist')
-
-    payload = UserController.transform_payload(payload)
+    payload = await UserController.transform_payload(payload)
     new_user = await UserController.create(db, payload.dict())
-    return new_user
+    if not new_user:
+        raise ConflictException(detail='Account already exist')
+    return user_serializer.response(new_user, status.HTTP_201_CREATED)
+
+
+async def read_ndjson_lines(request: Request):
+    buffer = b''
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            yield line
+    yield buffer
+
+
+async def read_import_rows(request: Request, report: BulkImportResponse):
+    if not request.headers.get('content-type', '').startswith(NDJSON_MEDIA_TYPE):
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise BadRequestException(detail='Request body is not valid JSON')
+        if not isinstance(rows, list):
+            raise BadRequestException(detail='Expected a JSON array of users')
+        for row_number, row in enumerate(rows):
+            yield row_number, row
+        return
+
+    row_number = 0
+    async for line in read_ndjson_lines(request):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            report.errors.append(BulkImportRowError(row=row_number, detail='Invalid JSON'))
+        row_number += 1
+
+
+@router.post('/bulk', status_code=status.HTTP_200_OK,
+             response_model=BulkImportResponse)
+async def bulk_import_users(request: Request,
+                            db: AsyncSession = Depends(get_db)):
+    report, batch = BulkImportResponse(), []
+    async for row in read_import_rows(request, report):
+        batch.append(row)
+        if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+            await UserController.import_batch(db, batch, report)
+            batch = []
+    if batch:
+        await UserController.import_batch(db, batch, report)
+    return report
 
 
 @router.get('/{user_id}', status_code=status.HTTP_200_OK,
@@ -60,19 +108,21 @@ async def get_user(user_id: str = Path(),
     user = await UserController.get(db, user_id)
     if not user:
         raise NotFoundException(detail=f'No users with {user_id} id')
-    return user
+    return user_serializer.response(user)
 
 
 @router.put('/{user_id}', status_code=status.HTTP_200_OK,
             response_model=ResponseUserSchema)
-async def update_user(request: Request, payload: UpdateUserSchema,
+async def update_user(payload: UpdateUserSchema,
+                      db: AsyncSession = Depends(get_db),
                       user_id: str = Path()):
-    db = request.state.db
     user = await UserController.get(db, user_id)
     if not user:
         raise NotFoundException(detail='User does not exist')
     updated_user = await UserController.update(db, user, payload.dict())
-    return updated_user
+    if not updated_user:
+        raise NotFoundException(detail='User does not exist')
+    return user_serializer.response(updated_user)
 
 
 @router.delete('/{user_id}', status_code=status.HTTP_200_OK,
@@ -85,3 +135,15 @@ async def delete_user(db: AsyncSession = Depends(get_db),
 
     await UserController.delete(db, user)
     return {'status': 'success', 'message': 'User deleted successfully'}
+
+
+@router.post('/{user_id}/revoke_sessions', status_code=status.HTTP_200_OK,
+             response_model=StatusResponse)
+async def revoke_user_sessions(db: AsyncSession = Depends(get_db),
+                               user_id: str = Path()):
+    user = await UserController.get(db, user_id)
+    if not user:
+        raise NotFoundException(detail='User does not exist')
+
+    await revocation_epochs.revoke_all(str(user.id))
+    return {'status': 'success', 'message': 'All sessions of the user revoked'}
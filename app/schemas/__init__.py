@@ -1,4 +1,5 @@
-from .general_schemas import StatusResponse
+from .general_schemas import StatusResponse, PageResponse
 from .settings_schemas import ResponseSettingsSchema, CreateSettingsSchema, UpdateSettingsSchema
 from .token_schemas import TokensResponse, TokenData, UserData
-from .user_schemas import RegisterUserSchema, UpdateUserSchema, ResponseUserSchema
+from .user_schemas import (RegisterUserSchema, UpdateUserSchema, ResponseUserSchema, CachedUserSchema,
+                           BulkImportResponse, BulkImportRowError, password_policy)
@@ -1,6 +1,17 @@
+from typing import Generic, Optional, TypeVar
+
 from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+ItemT = TypeVar('ItemT')
 
 
 class StatusResponse(BaseModel):
     status: str
     message: str
+
+
+class PageResponse(GenericModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: Optional[str]
+    next: Optional[str]
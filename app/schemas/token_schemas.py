@@ -1,5 +1,7 @@
 import uuid
 
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -17,6 +19,8 @@ class TokenData(BaseModel):
     token_type: str
     jti: str
     exp: int
+    iat: float = 0.0
+    fid: Optional[str] = None
 
 
 class UserData(BaseModel):
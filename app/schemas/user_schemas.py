@@ -1,12 +1,31 @@
+import re
 import uuid
 
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, validator
 
-from app.config import config
+from app.config import AppSettings
 from app.constants import RoleType
 
 
+class PasswordPolicy:
+    def __init__(self):
+        self.pattern = None
+
+    def configure(self, settings: AppSettings):
+        self.pattern = re.compile(settings.PASSWORD_REGEX)
+
+    def validate(self, password: str) -> str:
+        if self.pattern is None:
+            raise ValueError('password policy is not configured')
+        if not self.pattern.match(password):
+            raise ValueError(f'string does not match regex "{self.pattern.pattern}"')
+        return password
+
+
+password_policy = PasswordPolicy()
+
+
 class UserBaseSchema(BaseModel):
     username: str
     name: str
@@ -14,10 +33,14 @@ class UserBaseSchema(BaseModel):
 
 
 class RegisterUserSchema(UserBaseSchema):
-    hashed_password: constr(regex=config.PASSWORD_REGEX)
+    hashed_password: str
     role: RoleType = RoleType.USER
     verified: bool = False
 
+    @validator('hashed_password')
+    def check_password(cls, value: str) -> str:
+        return password_policy.validate(value)
+
 
 class CreateUserSchema(UserBaseSchema):
     verified: bool = False
@@ -36,3 +59,18 @@ class ResponseUserSchema(UserBaseSchema):
 
     class Config:
         orm_mode = True
+
+
+class CachedUserSchema(ResponseUserSchema):
+    verified: bool
+
+
+class BulkImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int = 0
+    conflicts: list[BulkImportRowError] = []
+    errors: list[BulkImportRowError] = []
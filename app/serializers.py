@@ -0,0 +1,42 @@
+import uuid
+import operator
+
+import orjson
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.schemas import ResponseUserSchema, ResponseSettingsSchema
+
+
+def encode_default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
+class ORMJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORMSerializer:
+    def __init__(self, schema: type[BaseModel]):
+        self.fields = tuple(field.alias for field in schema.__fields__.values())
+        self._values = operator.attrgetter(*self.fields)
+
+    def to_dict(self, obj) -> dict:
+        return dict(zip(self.fields, self._values(obj)))
+
+    def response(self, obj, status_code: int = status.HTTP_200_OK, headers: dict = None) -> ORMJSONResponse:
+        return ORMJSONResponse(self.to_dict(obj), status_code=status_code, headers=headers)
+
+    def page_response(self, page: dict, response: Response) -> ORMJSONResponse:
+        to_dict = self.to_dict
+        fast_response = ORMJSONResponse({**page, 'items': [to_dict(item) for item in page['items']]})
+        fast_response.headers.raw.extend(response.headers.raw)
+        return fast_response
+
+
+user_serializer = ORMSerializer(ResponseUserSchema)
+settings_serializer = ORMSerializer(ResponseSettingsSchema)
@@ -0,0 +1,18 @@
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.database import commit
+
+
+class UnitOfWorkRoute(APIRoute):
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request) -> Response:
+            response = await route_handler(request)
+            db = getattr(request.state, 'db', None)
+            if db is not None and db.in_transaction():
+                await commit(db)
+            return response
+
+        return unit_of_work_handler
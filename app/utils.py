@@ -1,19 +1,43 @@
+import json
+import time
 import uuid
+import base64
+import hashlib
+from fastapi import Request, Response
 from jose import jwt, JWTError
 
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 
-from app.config import config
+from app.config import AppSettings
 from app.schemas import TokenData
 from app.constants import TokenType
-from app.exceptions import UnauthorizedException
+from app.exceptions import UnauthorizedException, BadRequestException
+from app.lru_cache import LRUCache
+from app.metrics import registry, jwt_duration, GaugeCallback
+from app.keys import keyrings, build_keyrings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-ACCESS_TOKEN_EXPIRES_IN = timedelta(minutes=config.ACCESS_TOKEN_EXPIRES_IN)
-REFRESH_TOKEN_EXPIRES_IN = timedelta(minutes=config.REFRESH_TOKEN_EXPIRES_IN)
-VERIFICATION_TOKEN_EXPIRES_IN = timedelta(minutes=config.VERIFICATION_TOKEN_EXPIRES_IN)
+verified_tokens = LRUCache(maxsize=0)
+
+VERIFIED_TOKEN_METRICS = (
+    ('verified_token_cache_size', 'size', 'Verified tokens held in memory', 'gauge'),
+    ('verified_token_cache_maxsize', 'maxsize', 'Configured verified token cache size', 'gauge'),
+    ('verified_token_cache_hits_total', 'hits', 'Tokens accepted without verifying the signature', 'counter'),
+    ('verified_token_cache_misses_total', 'misses', 'Tokens whose signature had to be verified', 'counter'),
+)
+
+for metric_name, key, description, metric_type in VERIFIED_TOKEN_METRICS:
+    registry.register(GaugeCallback(metric_name, description, lambda key=key: verified_tokens.stats()[key],
+                                    metric_type))
+
+
+def configure_tokens(settings: AppSettings):
+    keyrings.clear()
+    keyrings.update(build_keyrings(settings))
+    verified_tokens.maxsize = settings.VERIFIED_TOKEN_CACHE_SIZE
+    verified_tokens.clear()
 
 
 class ProcessPassword:
@@ -26,12 +50,49 @@ class ProcessPassword:
         return pwd_context.verify(password, hashed_password)
 
 
+class ProcessCursor:
+    @staticmethod
+    def encode_cursor(created_at: datetime, obj_id: uuid.UUID) -> str:
+        raw = json.dumps([created_at.isoformat(), str(obj_id)]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, obj_id = json.loads(raw)
+            return datetime.fromisoformat(created_at), uuid.UUID(obj_id)
+        except (ValueError, TypeError):
+            raise BadRequestException(detail='Invalid cursor')
+
+    @staticmethod
+    def page_response(request: Request, response: Response, items: list, next_cursor: str | None) -> dict:
+        next_url = None
+        if next_cursor:
+            next_url = str(request.url.include_query_params(cursor=next_cursor))
+            response.headers['Link'] = f'<{next_url}>; rel="next"'
+        return {'items': items, 'next_cursor': next_cursor, 'next': next_url}
+
+
+class ProcessETag:
+    @staticmethod
+    def make_etag(obj_id: uuid.UUID, updated_at: datetime) -> str:
+        return f'W/"{obj_id.hex}-{int(updated_at.timestamp() * 1_000_000):x}"'
+
+    @staticmethod
+    def matches(header: str | None, etag: str) -> bool:
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        opaque_tag = etag.removeprefix('W/')
+        return any(candidate.strip().removeprefix('W/') == opaque_tag for candidate in header.split(','))
+
+
 class ProcessToken:
-    TOKEN_CONFIG = {
-        TokenType.ACCESS: (config.JWT_PUBLIC_KEY, config.JWT_ALGORITHM),
-        TokenType.REFRESH: (config.JWT_PRIVATE_KEY, config.JWT_ALGORITHM),
-        TokenType.VERIFICATION: (config.VERIFICATION_SECRET_KEY, config.VERIFICATION_ALGORITHM)
-    }
+    @staticmethod
+    def expires_in(token_type: TokenType) -> timedelta:
+        return keyrings[token_type].lifetime
 
     @staticmethod
     def create_token_payload(user_info: dict,
@@ -41,43 +102,65 @@ class ProcessToken:
         encode = {**user_info,
                   'token_type': token_type,
                   'jti': str(uuid.uuid4()),
+                  'iat': time.time(),
                   'exp': expires.timestamp()}
         return encode
 
     @staticmethod
     def create_token(encode: dict, token_type: TokenType) -> str:
-        secret_key, algorithm = ProcessToken.TOKEN_CONFIG[token_type]
-        token = jwt.encode(encode, secret_key, algorithm=algorithm)
+        key = keyrings[token_type].signing_key()
+        start = time.perf_counter()
+        token = key.backend.encode(encode, {'kid': key.kid})
+        jwt_duration.observe(time.perf_counter() - start, 'sign', token_type.value)
         return token
 
     @staticmethod
-    def create_access_and_refresh_tokens(user_info: dict) -> dict:
+    def create_access_and_refresh_tokens(user_info: dict, family_id: str = None, refresh_jti: str = None) -> dict:
         access_token_payload = ProcessToken.create_token_payload(user_info=user_info,
-                                                                 expires_delta=ACCESS_TOKEN_EXPIRES_IN,
+                                                                 expires_delta=ProcessToken.expires_in(TokenType.ACCESS),
                                                                  token_type=TokenType.ACCESS)
         refresh_token_payload = ProcessToken.create_token_payload(user_info=user_info,
-                                                                  expires_delta=REFRESH_TOKEN_EXPIRES_IN,
+                                                                  expires_delta=ProcessToken.expires_in(TokenType.REFRESH),
                                                                   token_type=TokenType.REFRESH)
+        refresh_token_payload['fid'] = family_id or str(uuid.uuid4())
+        if refresh_jti:
+            refresh_token_payload['jti'] = refresh_jti
         access_token = ProcessToken.create_token(access_token_payload, TokenType.ACCESS)
         refresh_token = ProcessToken.create_token(refresh_token_payload, TokenType.REFRESH)
         return {'access_token': access_token, 'refresh_token': refresh_token}
 
     @staticmethod
-    def decode_token(token: str, token_type: TokenType = TokenType.ACCESS) -> dict:
+    def decode_token(token: str, token_type: TokenType = TokenType.ACCESS) -> tuple[str | None, dict]:
+        start = time.perf_counter()
         try:
-            secret_key, algorithm = ProcessToken.TOKEN_CONFIG[token_type]
-            payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+            kid = jwt.get_unverified_header(token).get('kid')
+            key = keyrings[token_type].verification_key(kid)
+            if key is None:
+                raise UnauthorizedException(detail='Could not validate a user')
+            payload = key.backend.decode(token)
         except JWTError:
             raise UnauthorizedException(detail='Could not validate a user')
-        return payload
+        finally:
+            jwt_duration.observe(time.perf_counter() - start, 'verify', token_type.value)
+        return kid, payload
 
     @staticmethod
     def validate_token(token: str, token_type: TokenType = TokenType.ACCESS) -> TokenData:
-        payload = ProcessToken.decode_token(token, token_type)
-        token_data = TokenData(**payload)
-
-        if token_data.sub is None or token_data.user_id is None:
-            raise UnauthorizedException(detail='Could not validate a user')
+        cache_key = (token_type, hashlib.sha256(token.encode()).digest())
+        cached = verified_tokens.get(cache_key)
+        if cached is None:
+            kid, payload = ProcessToken.decode_token(token, token_type)
+            token_data = TokenData(**payload)
+
+            if token_data.sub is None or token_data.user_id is None:
+                raise UnauthorizedException(detail='Could not validate a user')
+
+            verified_tokens.set(cache_key, (kid, token_data), expires_at=token_data.exp)
+        else:
+            kid, token_data = cached
+            if keyrings[token_type].verification_key(kid) is None:
+                verified_tokens.pop(cache_key)
+                raise UnauthorizedException(detail='Could not validate a user')
 
         if datetime.fromtimestamp(token_data.exp) < datetime.now():
             raise UnauthorizedException(detail="Token expired")
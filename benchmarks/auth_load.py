@@ -0,0 +1,255 @@
+"""Throughput and p50/p95/p99 latency per route for a weighted mix of auth traffic.
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    python -m benchmarks.auth_load --start-app --duration 60 --concurrency 64
+
+--start-app migrates the stand-in Postgres from benchmarks/docker-compose.yml to head and serves
+the app with uvicorn against the stand-ins; without it the benchmark drives --base-url. Either
+way the --users sessions (--admins of them admins) are seeded as verified accounts straight into
+the configured database, since registration never creates verified or admin accounts.
+Results are written to benchmarks/results/ (or --output) for comparison with
+python -m benchmarks.compare.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import subprocess
+
+from contextlib import contextmanager
+
+import httpx
+
+from benchmarks.common import LatencyRecorder, print_summary, save_results
+
+API = '/api/v1'
+
+STAND_IN_ENV = {
+    'POSTGRES_HOST': '127.0.0.1',
+    'POSTGRES_HOSTNAME': '127.0.0.1',
+    'DATABASE_PORT': '6501',
+    'POSTGRES_USER': 'bench',
+    'POSTGRES_PASSWORD': 'bench',
+    'POSTGRES_DB': 'bench',
+    'REDIS_HOST': '127.0.0.1',
+    'REDIS_PORT': '6380',
+    'REDIS_PASSWORD': 'bench',
+    'EMAIL_BACKEND': 'sink',
+    'RATE_LIMIT': str(10 ** 9),
+}
+
+MIXES = {
+    'default': {'verify': 40, 'settings_read': 20, 'settings_write': 10, 'refresh': 10,
+                'admin_list': 10, 'login': 7, 'register': 3},
+    'read_heavy': {'verify': 60, 'settings_read': 30, 'admin_list': 10},
+    'write_heavy': {'register': 20, 'login': 20, 'refresh': 20, 'settings_write': 40},
+}
+
+
+SEED_SCRIPT = """
+import sys, json, uuid, asyncio
+from app.config import DatabaseSettings
+from app.database import database
+from app.controllers import UserController
+from app.utils import ProcessPassword
+
+async def seed(users):
+    database.start(DatabaseSettings())
+    async with database.session_factory() as db:
+        await UserController.bulk_create(db, users)
+        await db.commit()
+    await database.shutdown()
+
+request = json.load(sys.stdin)
+hashed_password = ProcessPassword.hash_password(request['password'])
+asyncio.run(seed([{**user, 'id': uuid.uuid4(), 'hashed_password': hashed_password} for user in request['users']]))
+"""
+
+
+class Session:
+    def __init__(self, username: str, password: str, role: str, tokens: dict):
+        self.username = username
+        self.password = password
+        self.role = role
+        self.access_token = tokens['access_token']
+        self.refresh_token = tokens['refresh_token']
+        self.settings = None
+
+    @property
+    def headers(self) -> dict:
+        return {'Authorization': f'Bearer {self.access_token}'}
+
+
+def registration(prefix: str, password: str) -> dict:
+    username = f'{prefix}_{uuid.uuid4().hex[:12]}'
+    return {'username': username, 'name': username, 'email': f'{username}@bench.local',
+            'hashed_password': password}
+
+
+async def register(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    return await client.post(f'{API}/auth/register', json=registration(args.prefix, args.password))
+
+
+async def login(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    return await client.post(f'{API}/auth/token', data={'username': session.username, 'password': session.password})
+
+
+async def refresh(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    response = await client.post(f'{API}/auth/token/refresh',
+                                 headers={'Authorization': f'Bearer {session.refresh_token}'})
+    if response.status_code == 200:
+        tokens = response.json()
+        session.access_token, session.refresh_token = tokens['access_token'], tokens['refresh_token']
+    return response
+
+
+async def verify(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    return await client.get(f'{API}/auth/token/verify', headers=session.headers)
+
+
+async def settings_read(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    response = await client.get(f'{API}/users/settings/', headers=session.headers)
+    if response.status_code == 200:
+        session.settings = response.json()
+    return response
+
+
+async def settings_write(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    if session.settings is None:
+        response = await settings_read(client, session, args)
+        if response.status_code != 200:
+            return response
+    payload = {**session.settings, 'dark_mode': not session.settings['dark_mode']}
+    response = await client.put(f'{API}/users/settings/', headers=session.headers, json=payload)
+    if response.status_code == 200:
+        session.settings = response.json()
+    return response
+
+
+async def admin_list(client: httpx.AsyncClient, session: Session, args) -> httpx.Response:
+    return await client.get(f'{API}/users/', headers=session.headers, params={'limit': args.page_size})
+
+
+OPERATIONS = {
+    'register': register,
+    'login': login,
+    'refresh': refresh,
+    'verify': verify,
+    'settings_read': settings_read,
+    'settings_write': settings_write,
+    'admin_list': admin_list,
+}
+
+
+def seed_users(env: dict, args) -> list[dict]:
+    users = []
+    for index in range(args.users):
+        user = registration(args.prefix, args.password)
+        del user['hashed_password']
+        users.append({**user, 'verified': True, 'role': 'admin' if index < args.admins else 'user'})
+    subprocess.run([sys.executable, '-c', SEED_SCRIPT], env=env, check=True, text=True,
+                   input=json.dumps({'password': args.password, 'users': users}))
+    return users
+
+
+async def create_session(client: httpx.AsyncClient, user: dict, args) -> Session:
+    response = await client.post(f'{API}/auth/token',
+                                 data={'username': user['username'], 'password': args.password})
+    response.raise_for_status()
+    return Session(user['username'], args.password, user['role'], response.json())
+
+
+async def worker(client: httpx.AsyncClient, session: Session, admin: Session | None, rng: random.Random, args,
+                 deadline: float, recorder: LatencyRecorder):
+    names, weights = zip(*MIXES[args.mix].items())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        response = await OPERATIONS[name](client, (admin or session) if name == 'admin_list' else session, args)
+        recorder.record(name, (time.perf_counter() - start) * 1000, response.status_code)
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get('/healthchecker')).status_code == 200:
+                    return
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+@contextmanager
+def serve_app(env: dict, args):
+    subprocess.run([sys.executable, '-m', 'alembic', 'upgrade', 'head'], env=env, check=True)
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1',
+                               '--port', str(args.port), '--workers', str(args.app_workers),
+                               '--log-level', 'warning'], env=env)
+    try:
+        yield f'http://127.0.0.1:{args.port}'
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(users: list[dict], args):
+    await wait_until_ready(args.base_url)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        sessions = [await create_session(client, user, args) for user in users]
+        admin = next((session for session in sessions if session.role == 'admin'), None)
+
+        warmup_deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*[worker(client, sessions[index % len(sessions)], admin,
+                                      random.Random(args.seed + index), args, warmup_deadline, LatencyRecorder())
+                               for index in range(args.concurrency)])
+
+        recorder = LatencyRecorder()
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[worker(client, sessions[index % len(sessions)], admin,
+                                      random.Random(args.seed + index), args, deadline, recorder)
+                               for index in range(args.concurrency)])
+        recorder.stop()
+    return recorder.summary()
+
+
+def main(args):
+    parameters = {key: value for key, value in vars(args).items() if key not in ('password', 'output')}
+    parameters['weights'] = MIXES[args.mix]
+    if args.start_app:
+        env = {**os.environ, **STAND_IN_ENV}
+        with serve_app(env, args) as base_url:
+            args.base_url = base_url
+            summary = asyncio.run(run(seed_users(env, args), args))
+    else:
+        summary = asyncio.run(run(seed_users(dict(os.environ), args), args))
+
+    print_summary(summary)
+    print(f"results written to {save_results('auth_load', parameters, summary, args.output)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--start-app', action='store_true')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--app-workers', type=int, default=1)
+    parser.add_argument('--mix', choices=MIXES, default='default')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--admins', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='bench')
+    parser.add_argument('--password', default='Bench#Passw0rd')
+    parser.add_argument('--output')
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+
+from pathlib import Path
+from datetime import datetime, timezone
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name: str, elapsed_ms: float, status: int):
+        self.samples.setdefault(name, []).append(elapsed_ms)
+        statuses = self.statuses.setdefault(name, {})
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        routes = {}
+        for name, samples in sorted(self.samples.items()):
+            statuses = self.statuses[name]
+            routes[name] = {
+                'requests': len(samples),
+                'errors': sum(count for status, count in statuses.items() if status >= 400),
+                'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(samples, 50),
+                'p95_ms': percentile(samples, 95),
+                'p99_ms': percentile(samples, 99),
+                'mean_ms': statistics.fmean(samples),
+                'max_ms': max(samples),
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {'elapsed_s': elapsed,
+                'requests': total,
+                'throughput_rps': total / elapsed if elapsed else 0.0,
+                'routes': routes}
+
+
+def print_summary(summary: dict):
+    print(f"{'route':>16} {'requests':>9} {'errors':>7} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, route in summary['routes'].items():
+        print(f"{name:>16} {route['requests']:>9} {route['errors']:>7} {route['throughput_rps']:>9.1f} "
+              f"{route['p50_ms']:>6.2f}ms {route['p95_ms']:>6.2f}ms {route['p99_ms']:>6.2f}ms")
+    print(f"{'total':>16} {summary['requests']:>9} {'':>7} {summary['throughput_rps']:>9.1f}")
+
+
+def save_results(benchmark: str, parameters: dict, results: dict, output: str | None = None) -> Path:
+    started_at = datetime.now(timezone.utc)
+    path = Path(output) if output else RESULTS_DIR / f"{benchmark}-{started_at:%Y%m%dT%H%M%SZ}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        'benchmark': benchmark,
+        'created_at': started_at.isoformat(),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'results': results,
+    }
+    path.write_text(json.dumps(document, indent=2))
+    return path
@@ -0,0 +1,37 @@
+"""Per-route throughput and latency deltas between two saved benchmark runs.
+
+    python -m benchmarks.compare benchmarks/results/auth_load-A.json benchmarks/results/auth_load-B.json
+"""
+import json
+import argparse
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return 'n/a'
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def main(args):
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline = json.load(baseline_file)
+        candidate = json.load(candidate_file)
+    print(f"baseline {baseline['git_revision']} ({baseline['created_at']}) -> "
+          f"candidate {candidate['git_revision']} ({candidate['created_at']})")
+
+    before_routes, after_routes = baseline['results']['routes'], candidate['results']['routes']
+    print(f"{'route':>16} " + ' '.join(f'{metric:>24}' for metric in METRICS))
+    for name in sorted(before_routes.keys() & after_routes.keys()):
+        before, after = before_routes[name], after_routes[name]
+        cells = [f"{before[metric]:>8.2f} -> {after[metric]:>8.2f} {change(before[metric], after[metric]):>6}"
+                 for metric in METRICS]
+        print(f"{name:>16} " + ' '.join(f'{cell:>24}' for cell in cells))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    main(parser.parse_args())
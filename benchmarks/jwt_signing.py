@@ -0,0 +1,72 @@
+"""Sign and verify operations per second for each JWT algorithm and signing backend.
+
+    python -m benchmarks.jwt_signing --seconds 2
+
+Keys are generated fresh for every run; the claims mirror an access token.
+"""
+import time
+import uuid
+import argparse
+
+from datetime import datetime, timedelta
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from app.keys import JoseBackend, CryptographyBackend
+from benchmarks.common import save_results
+
+
+def private_pem(key) -> str:
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode()
+
+
+def backends() -> dict:
+    rsa_key = private_pem(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    ec_key = private_pem(ec.generate_private_key(ec.SECP256R1()))
+    ed_key = private_pem(ed25519.Ed25519PrivateKey.generate())
+    return {
+        'HS256/jose': JoseBackend('HS256', uuid.uuid4().hex, None),
+        'RS256/jose': JoseBackend('RS256', rsa_key, None),
+        'ES256/jose': JoseBackend('ES256', ec_key, None),
+        'ES256/cryptography': CryptographyBackend('ES256', ec_key, None),
+        'EdDSA/cryptography': CryptographyBackend('EdDSA', ed_key, None),
+    }
+
+
+def ops_per_second(operation, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            operation()
+        count += 50
+    return count / (time.perf_counter() - start)
+
+
+def main(args):
+    claims = {'sub': 'bench', 'user_id': str(uuid.uuid4()), 'user_role': 'user', 'token_type': 'access_token',
+              'jti': str(uuid.uuid4()), 'exp': (datetime.utcnow() + timedelta(minutes=15)).timestamp()}
+    results = {}
+    for name, backend in backends().items():
+        token = backend.encode(claims, {'kid': 'bench'})
+        assert backend.decode(token)['sub'] == 'bench'
+        results[name] = {'sign_ops': ops_per_second(lambda: backend.encode(claims, {'kid': 'bench'}), args.seconds),
+                         'verify_ops': ops_per_second(lambda: backend.decode(token), args.seconds),
+                         'token_bytes': len(token)}
+
+    print(f"{'algorithm/backend':>20} {'sign/s':>10} {'verify/s':>10} {'token bytes':>12}")
+    for name, result in results.items():
+        print(f"{name:>20} {result['sign_ops']:>10.0f} {result['verify_ops']:>10.0f} {result['token_bytes']:>12}")
+    if args.save:
+        print(f"results written to {save_results('jwt_signing', {'seconds': args.seconds}, results, args.output)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=2)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--output')
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""Latency of /auth/token/verify while /auth/token is saturated.
+
+    python -m benchmarks.login_contention --username bench --password secret
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+from benchmarks.common import percentile
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> httpx.Response:
+    return await client.post('/api/v1/auth/token', data={'username': username, 'password': password})
+
+
+async def verify_loop(client: httpx.AsyncClient, token: str, deadline: float, samples: list[float]):
+    headers = {'Authorization': f'Bearer {token}'}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get('/api/v1/auth/token/verify', headers=headers)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+async def login_loop(client: httpx.AsyncClient, username: str, password: str, deadline: float, statuses: dict):
+    while time.perf_counter() < deadline:
+        response = await login(client, username, password)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run_phase(args, token: str, login_workers: int) -> dict:
+    samples, statuses = [], {}
+    deadline = time.perf_counter() + args.duration
+    limits = httpx.Limits(max_connections=args.verify_workers + login_workers)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(
+            *[verify_loop(client, token, deadline, samples) for _ in range(args.verify_workers)],
+            *[login_loop(client, args.username, args.password, deadline, statuses) for _ in range(login_workers)]
+        )
+    return {
+        'verify_requests': len(samples),
+        'verify_p50_ms': percentile(samples, 50),
+        'verify_p99_ms': percentile(samples, 99),
+        'verify_mean_ms': statistics.fmean(samples) if samples else 0.0,
+        'login_statuses': statuses,
+    }
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        response = await login(client, args.username, args.password)
+        response.raise_for_status()
+        token = response.json()['access_token']
+
+    idle = await run_phase(args, token, login_workers=0)
+    saturated = await run_phase(args, token, login_workers=args.login_workers)
+    for name, result in (('idle', idle), ('saturated', saturated)):
+        print(f"{name:>10}: {result['verify_requests']} verify requests, "
+              f"p50={result['verify_p50_ms']:.2f}ms p99={result['verify_p99_ms']:.2f}ms "
+              f"login statuses={result['login_statuses']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--verify-workers', type=int, default=4)
+    parser.add_argument('--login-workers', type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""Per-request cost of the middleware stack, measured by calling the ASGI app directly.
+
+    python -m benchmarks.middleware_overhead --requests 20000
+
+RateLimitMiddleware is left out because it needs a live Redis; the BaseHTTPMiddleware
+stack mirrors the dispatch-based classes the ASGI middlewares replaced.
+"""
+import time
+import asyncio
+import argparse
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middlewares import RequestIDMiddleware, LogRequestsMiddleware, ExceptionHandlingMiddleware
+
+
+class PassthroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def build_app(middlewares: list) -> FastAPI:
+    app = FastAPI(middleware=middlewares)
+
+    @app.get('/healthchecker')
+    async def root():
+        return {'message': 'Hello World'}
+
+    return app
+
+
+STACKS = {
+    'bare': [],
+    'base_http_middleware': [(PassthroughMiddleware, {}) for _ in range(3)],
+    'asgi_middleware': [(RequestIDMiddleware, {}), (LogRequestsMiddleware, {}), (ExceptionHandlingMiddleware, {})],
+}
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+             'scheme': 'http', 'path': '/healthchecker', 'raw_path': b'/healthchecker', 'root_path': '',
+             'query_string': b'', 'headers': [(b'host', b'bench')], 'client': ('127.0.0.1', 1234),
+             'server': ('bench', 80)}
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        response_complete = asyncio.Event()
+
+        async def receive():
+            if request_messages:
+                return request_messages.pop()
+            await response_complete.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                response_complete.set()
+
+        await app({**scope, 'headers': list(scope['headers'])}, receive, send)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main(args):
+    results = {}
+    for name, middlewares in STACKS.items():
+        app = build_app(middlewares)
+        await run(app, args.requests // 10)
+        results[name] = await run(app, args.requests)
+
+    for name, per_request in results.items():
+        overhead = per_request - results['bare']
+        print(f"{name:>22}: {per_request:8.1f} us/request  (+{overhead:.1f} us over bare)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""Cost of turning a page of ORM rows into response bytes, FastAPI's default path against the orjson serializer.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+
+The default path is what a route with response_model=PageResponse[...] does: validate every row
+through the schema, run jsonable_encoder and render with the stdlib json module.
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+
+from datetime import datetime, timezone, timedelta
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Users, Settings
+from app.schemas import PageResponse, ResponseUserSchema, ResponseSettingsSchema
+from app.serializers import user_serializer, settings_serializer
+from benchmarks.common import percentile, save_results
+
+
+def make_users(rows: int) -> list[Users]:
+    now = datetime.now(timezone.utc)
+    return [Users(id=uuid.uuid4(), username=f'user{i}', name=f'User {i}', email=f'user{i}@example.com',
+                  hashed_password='x', verified=True, role='user',
+                  created_at=now + timedelta(microseconds=i), updated_at=now) for i in range(rows)]
+
+
+def make_settings(rows: int) -> list[Settings]:
+    now = datetime.now(timezone.utc)
+    return [Settings(id=uuid.uuid4(), user_id=uuid.uuid4(), notifications=bool(i % 2), dark_mode=False,
+                     language='en', timezone='UTC', country='US', created_at=now, updated_at=now)
+            for i in range(rows)]
+
+
+def default_path(field):
+    async def render(page: dict) -> bytes:
+        content = await serialize_response(field=field, response_content=page)
+        return JSONResponse(content).body
+    return render
+
+
+def fast_path(serializer):
+    async def render(page: dict) -> bytes:
+        return serializer.page_response(page, Response()).body
+    return render
+
+
+async def measure(render, page: dict, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await render(page)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run(args) -> dict:
+    cases = {
+        'users': (make_users(args.rows), ResponseUserSchema, user_serializer),
+        'settings': (make_settings(args.rows), ResponseSettingsSchema, settings_serializer),
+    }
+    results = {}
+    for name, (rows, schema, serializer) in cases.items():
+        page = {'items': rows, 'next_cursor': None, 'next': None}
+        paths = {'default': default_path(create_response_field(name=name, type_=PageResponse[schema])),
+                 'orjson': fast_path(serializer)}
+        assert json.loads(await paths['default'](page)) == json.loads(await paths['orjson'](page))
+        for path, render in paths.items():
+            samples = await measure(render, page, args.repeat)
+            results[f'{name}/{path}'] = {'p50_ms': percentile(samples, 50), 'p95_ms': percentile(samples, 95),
+                                         'rows_per_second': args.rows / (percentile(samples, 50) / 1000)}
+    return results
+
+
+def main(args):
+    results = asyncio.run(run(args))
+    print(f"{'case':>18} {'p50 ms':>10} {'p95 ms':>10} {'rows/s':>12}")
+    for name, result in results.items():
+        print(f"{name:>18} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['rows_per_second']:>12.0f}")
+    if args.save:
+        params = {'rows': args.rows, 'repeat': args.repeat}
+        print(f"results written to {save_results('serialization', params, results, args.output)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--output')
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""Cold-start cost of a worker: importing app.main, building the app and running the lifespan startup.
+
+    python -m benchmarks.startup --runs 10 --importtime 15
+
+Every run is a fresh interpreter, so module caches never carry over between samples. The
+lifespan phase opens DATABASE_WARMUP_CONNECTIONS and REDIS_WARMUP_CONNECTIONS eagerly; a failed
+warm-up is only logged, so without live services the startup figure includes the failed connection
+attempts. Run against the stand-ins from benchmarks/docker-compose.yml for representative numbers,
+or set DATABASE_WARMUP_CONNECTIONS=0 and pass --memory-backends to time the app on its own.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from benchmarks.common import percentile, save_results
+
+PHASE_SCRIPT = """
+import json, time, asyncio
+timings = {}
+start = time.perf_counter()
+import app.main
+timings['import'] = time.perf_counter() - start
+start = time.perf_counter()
+application = app.main.create_app()
+timings['create_app'] = time.perf_counter() - start
+
+async def lifespan():
+    start = time.perf_counter()
+    async with application.router.lifespan_context(application):
+        timings['startup'] = time.perf_counter() - start
+        start = time.perf_counter()
+    timings['shutdown'] = time.perf_counter() - start
+
+asyncio.run(lifespan())
+print(json.dumps(timings))
+"""
+
+
+def run_phases(env: dict) -> dict:
+    output = subprocess.run([sys.executable, '-c', PHASE_SCRIPT], env=env, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, count: int) -> list[tuple[str, float]]:
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app.main; app.main.create_app()'],
+                            env=env, capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip().startswith('app'):
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:count]
+
+
+def main(args):
+    env = {**os.environ, 'PYTHONPATH': os.getcwd()}
+    if args.memory_backends:
+        env.update(CACHE_BACKEND='memory', EMAIL_BACKEND='sink')
+
+    samples = {}
+    for _ in range(args.runs):
+        for phase, seconds in run_phases(env).items():
+            samples.setdefault(phase, []).append(seconds * 1000)
+
+    results = {phase: {'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95), 'min_ms': min(values)}
+               for phase, values in samples.items()}
+    print(f"{'phase':>12} {'p50 ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    for phase, result in results.items():
+        print(f"{phase:>12} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['min_ms']:>10.1f}")
+
+    if args.importtime:
+        print(f"\n{'module':>40} {'cumulative ms':>14}")
+        for module, cumulative_ms in slowest_imports(env, args.importtime):
+            print(f"{module:>40} {cumulative_ms:>14.1f}")
+    if args.save:
+        params = {'runs': args.runs, 'memory_backends': args.memory_backends}
+        print(f"results written to {save_results('startup', params, results, args.output)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', type=int, default=0, help='list the N slowest app modules')
+    parser.add_argument('--memory-backends', action='store_true',
+                        help='use the in-process cache and email backends')
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--output')
+    main(parser.parse_args())
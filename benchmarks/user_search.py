@@ -0,0 +1,88 @@
+"""Query plans and latency of the admin user search over a seeded users table.
+
+    python -m benchmarks.user_search --rows 1000000
+
+Seeds bench_user_<n> rows into the configured database (skipped when enough rows
+already exist), then runs each search through UserController.search_filters.
+"""
+import time
+import asyncio
+import argparse
+
+import asyncpg
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+
+from app.config import DatabaseSettings
+from app.constants import PAGE_SIZE, SearchMatch
+from app.controllers import UserController
+from app.models import Users
+
+SEED_SQL = """
+INSERT INTO users (id, username, name, email, hashed_password, verified, role, created_at, updated_at)
+SELECT gen_random_uuid(),
+       'bench_user_' || n,
+       'Bench User ' || n,
+       'bench_user_' || n || '@' || (ARRAY['example.com', 'mail.test', 'corp.local'])[1 + n % 3],
+       'x',
+       true,
+       CASE WHEN n % 100 = 0 THEN 'admin' ELSE 'user' END,
+       now() - n * interval '1 second',
+       now()
+FROM generate_series($1::int, $2::int) AS n
+ON CONFLICT DO NOTHING
+"""
+
+SEARCHES = {
+    'username contains': dict(username='user_4242', match=SearchMatch.CONTAINS),
+    'username prefix': dict(username='bench_user_4242', match=SearchMatch.PREFIX),
+    'username short term': dict(username='be', match=SearchMatch.CONTAINS),
+    'email contains': dict(email='4242@mail', match=SearchMatch.CONTAINS),
+    'email prefix': dict(email='bench_user_99', match=SearchMatch.PREFIX),
+    'role': dict(role='admin'),
+}
+
+
+def compile_search(filters: list) -> tuple[str, list]:
+    query = select(Users).filter(*filters).order_by(Users.created_at, Users.id).limit(PAGE_SIZE)
+    compiled = query.compile(dialect=asyncpg_dialect.dialect())
+    return str(compiled), [compiled.params[name] for name in compiled.positiontup]
+
+
+async def seed(connection: asyncpg.Connection, rows: int, batch: int = 100_000):
+    existing = await connection.fetchval("SELECT count(*) FROM users WHERE username LIKE 'bench\\_user\\_%'")
+    for start in range(existing + 1, rows + 1, batch):
+        await connection.execute(SEED_SQL, start, min(rows, start + batch - 1))
+        print(f"seeded {min(rows, start + batch - 1)} / {rows}")
+    await connection.execute('ANALYZE users')
+
+
+async def main(args):
+    settings = DatabaseSettings()
+    connection = await asyncpg.connect(user=settings.POSTGRES_USER, password=settings.POSTGRES_PASSWORD,
+                                       host=settings.POSTGRES_HOSTNAME, port=settings.DATABASE_PORT,
+                                       database=settings.POSTGRES_DB)
+    try:
+        await seed(connection, args.rows)
+        for name, search in SEARCHES.items():
+            sql, params = compile_search(UserController.search_filters(**search))
+            plan = await connection.fetch(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', *params)
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await connection.fetch(sql, *params)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+
+            print(f"\n== {name}: median={timings[len(timings) // 2]:.2f}ms max={timings[-1]:.2f}ms")
+            print('\n'.join(row[0] for row in plan))
+    finally:
+        await connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+import os
+import uuid
+
+import pytest
+
+TEST_ENVIRONMENT = {
+    'DATABASE_PORT': '5432',
+    'POSTGRES_PASSWORD': 'postgres',
+    'POSTGRES_USER': 'postgres',
+    'POSTGRES_DB': 'postgres',
+    'POSTGRES_HOST': 'localhost',
+    'POSTGRES_HOSTNAME': 'localhost',
+    'EMAIL_HOST': 'localhost',
+    'EMAIL_PORT': '25',
+    'EMAIL_USERNAME': 'user',
+    'EMAIL_PASSWORD': 'password',
+    'EMAIL_FROM': 'noreply@example.com',
+    'JWT_PRIVATE_KEY': 'refresh-secret',
+    'JWT_PUBLIC_KEY': 'access-secret',
+    'JWT_ALGORITHM': 'HS256',
+    'REFRESH_TOKEN_EXPIRES_IN': '60',
+    'ACCESS_TOKEN_EXPIRES_IN': '15',
+    'VERIFICATION_TOKEN_EXPIRES_IN': '60',
+    'VERIFICATION_ALGORITHM': 'HS256',
+    'VERIFICATION_SECRET_KEY': 'verification-secret',
+    'CLIENT_ORIGIN': 'http://localhost:3000',
+    'PASSWORD_REGEX': '.{8,}',
+    'RATE_LIMIT': '100',
+    'RATE_LIMIT_INTERVAL': '60',
+}
+
+for name, value in TEST_ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+PASSWORD = 'Correct#Horse9'
+
+
+@pytest.fixture
+def settings():
+    from app.config import AppSettings
+    from app.constants import CacheBackendType, EmailBackend
+
+    return AppSettings(CACHE_BACKEND=CacheBackendType.MEMORY, EMAIL_BACKEND=EmailBackend.SINK,
+                       PASSWORD_HASH_WORKERS=1, DATABASE_WARMUP_CONNECTIONS=0)
+
+
+@pytest.fixture
+async def client(settings):
+    import httpx
+    from sqlalchemy import text
+
+    from app.main import create_app
+    from app.database import database
+    from app.models import Base
+
+    app = create_app(settings)
+    async with app.router.lifespan_context(app):
+        try:
+            async with database.engine.begin() as connection:
+                await connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                await connection.run_sync(Base.metadata.drop_all)
+                await connection.run_sync(Base.metadata.create_all)
+        except OSError as exc:
+            pytest.skip(f'Postgres is not available: {exc}')
+        async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+            yield client
+
+
+@pytest.fixture
+def login(client):
+    from app.database import database
+    from app.controllers import UserController
+    from app.utils import ProcessPassword
+
+    async def login(role: str) -> tuple[str, dict]:
+        username = f'{role}_{uuid.uuid4().hex[:8]}'
+        user = {'id': uuid.uuid4(), 'username': username, 'name': username, 'email': f'{username}@example.com',
+                'hashed_password': ProcessPassword.hash_password(PASSWORD), 'verified': True, 'role': role}
+        async with database.session_factory() as db:
+            await UserController.bulk_create(db, [user])
+            await db.commit()
+        response = await client.post('/api/v1/auth/token', data={'username': username, 'password': PASSWORD})
+        return str(user['id']), {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    return login
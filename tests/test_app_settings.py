@@ -0,0 +1,67 @@
+import pytest
+
+from app.main import create_app
+from app.constants import TokenType
+from app.cache import caches, user_cache, settings_etags, revocation_epochs
+from app.hashing import password_hasher
+from app.keys import keyrings, key_fingerprint
+from app.refresh_tokens import refresh_token_families
+from app.utils import ProcessToken, verified_tokens
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lifespan_applies_settings_to_singletons(settings):
+    app = create_app(settings.copy(update={'USER_CACHE_SIZE': 7, 'USER_CACHE_TTL': 11,
+                                           'PASSWORD_HASH_MAX_PENDING': 3, 'VERIFIED_TOKEN_CACHE_SIZE': 5,
+                                           'JWT_PUBLIC_KEY': 'rotated-access-secret',
+                                           'ACCESS_TOKEN_EXPIRES_IN': 2, 'REFRESH_TOKEN_EXPIRES_IN': 4,
+                                           'JWKS_MAX_AGE': 9}))
+    async with app.router.lifespan_context(app):
+        for cache in (user_cache, settings_etags):
+            assert (cache._local.maxsize, cache.ttl) == (7, 11)
+        assert (password_hasher.workers, password_hasher.max_pending) == (1, 3)
+        assert verified_tokens.maxsize == 5
+        assert keyrings[TokenType.ACCESS].default_kid == key_fingerprint('rotated-access-secret')
+        assert ProcessToken.expires_in(TokenType.ACCESS).total_seconds() == 120
+        assert revocation_epochs.lifetime.total_seconds() == refresh_token_families.ttl_ms / 1000 == 240
+        assert app.state.settings.JWKS_MAX_AGE == 9
+
+
+async def test_password_policy_follows_settings(settings):
+    from app.schemas import RegisterUserSchema
+
+    app = create_app(settings.copy(update={'PASSWORD_REGEX': '^[0-9]{4}$'}))
+    async with app.router.lifespan_context(app):
+        RegisterUserSchema(username='a', name='a', email='a@example.com', hashed_password='1234')
+        with pytest.raises(ValueError):
+            RegisterUserSchema(username='a', name='a', email='a@example.com', hashed_password='long enough')
+
+
+async def test_each_app_binds_its_rate_limiter_only_while_running(settings):
+    consumers = len(caches._consumers)
+    for _ in range(3):
+        app = create_app(settings)
+        async with app.router.lifespan_context(app):
+            assert len(caches._consumers) == consumers + 1
+    assert len(caches._consumers) == consumers
+
+
+async def test_failed_startup_shuts_down_what_already_started(settings, monkeypatch):
+    from app.database import database
+    from app.email import email_delivery
+
+    async def refuse(settings):
+        raise ConnectionError('SMTP is down')
+
+    monkeypatch.setattr(email_delivery, 'start', refuse)
+    consumers = len(caches._consumers)
+    app = create_app(settings)
+    with pytest.raises(ConnectionError):
+        async with app.router.lifespan_context(app):
+            pass
+
+    assert password_hasher._executor is None
+    assert caches.backend is None and caches._listener is None
+    assert database.engine is None
+    assert len(caches._consumers) == consumers
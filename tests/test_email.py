@@ -0,0 +1,100 @@
+import pytest
+
+from email.message import EmailMessage
+
+from aiosmtplib import SMTPServerDisconnected, SMTPRecipientsRefused, SMTPRecipientRefused
+
+from app.config import EmailSettings
+from app.email import EmailDelivery, SMTPBackend, SinkBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakySMTP:
+    def __init__(self, fail_after: int | None = None, refused: tuple = ()):
+        self.fail_after = fail_after
+        self.refused = refused
+        self.is_connected = False
+        self.sent = []
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def send_message(self, message: EmailMessage):
+        if len(self.sent) == self.fail_after:
+            self.fail_after = None
+            raise SMTPServerDisconnected('Connection lost')
+        if message['Subject'] in self.refused:
+            raise SMTPRecipientsRefused([SMTPRecipientRefused(550, 'No such user', message['To'])])
+        self.sent.append(message['Subject'])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+def message(subject: str) -> EmailMessage:
+    email = EmailMessage()
+    email['Subject'] = subject
+    email['To'] = f'{subject}@example.com'
+    return email
+
+
+async def test_retry_after_a_broken_connection_resends_only_undelivered_emails(monkeypatch):
+    client = FlakySMTP(fail_after=2)
+    monkeypatch.setattr(SMTPBackend, '_client', lambda backend: client)
+    delivery = EmailDelivery()
+    await delivery.start(EmailSettings(EMAIL_POOL_SIZE=1, EMAIL_BATCH_SIZE=5, EMAIL_RETRY_BACKOFF=0))
+
+    for index in range(5):
+        delivery.send(message(str(index)))
+    await delivery.shutdown()
+
+    assert client.sent == ['0', '1', '2', '3', '4']
+    assert delivery.failed == 0
+
+
+async def test_rejected_recipient_does_not_fail_the_rest_of_the_batch(monkeypatch):
+    client = FlakySMTP(refused=('bad',))
+    monkeypatch.setattr(SMTPBackend, '_client', lambda backend: client)
+    delivery = EmailDelivery()
+    await delivery.start(EmailSettings(EMAIL_POOL_SIZE=1, EMAIL_BATCH_SIZE=5, EMAIL_RETRY_BACKOFF=0))
+
+    for subject in ('a', 'bad', 'c', 'd'):
+        delivery.send(message(subject))
+    await delivery.shutdown()
+
+    assert client.sent == ['a', 'c', 'd']
+    assert (delivery.rejected, delivery.failed) == (1, 0)
+
+
+async def test_worker_survives_unexpected_errors(monkeypatch):
+    async def send_batch(backend, messages):
+        if messages[0]['Subject'] == 'broken':
+            raise RuntimeError('template bug')
+        backend.sent += len(messages)
+        return 0
+
+    monkeypatch.setattr(SinkBackend, 'send_batch', send_batch)
+    delivery = EmailDelivery()
+    await delivery.start(EmailSettings(EMAIL_BACKEND='sink', EMAIL_POOL_SIZE=1, EMAIL_BATCH_SIZE=1))
+
+    delivery.send(message('broken'))
+    delivery.send(message('fine'))
+    await delivery.shutdown()
+
+    assert delivery.failed == 1
+    assert delivery.backend.sent == 1
+
+
+async def test_full_queue_drops_instead_of_blocking():
+    delivery = EmailDelivery()
+    await delivery.start(EmailSettings(EMAIL_BACKEND='sink', EMAIL_POOL_SIZE=0, EMAIL_QUEUE_SIZE=1))
+
+    delivery.send(message('kept'))
+    delivery.send(message('dropped'))
+
+    assert delivery.dropped == 1
+    await delivery.shutdown(timeout=0)
@@ -0,0 +1,16 @@
+import pytest
+
+from app.hashing import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_workers_are_spawned_not_forked(settings):
+    hasher = PasswordHasher()
+    hasher.start(settings)
+    try:
+        assert hasher._executor._mp_context.get_start_method() == 'spawn'
+        hashed_password = await hasher.hash_password('Correct#Horse9')
+        assert await hasher.verify_password('Correct#Horse9', hashed_password)
+    finally:
+        hasher.shutdown()
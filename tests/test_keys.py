@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ec
+
+from app.config import JWTKeyConfig
+from app.keys import KeyRing
+
+PRIVATE_JWK_MEMBERS = {'d', 'p', 'q', 'dp', 'dq', 'qi', 'oth', 'k'}
+
+
+def private_pem(private_key) -> str:
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                     serialization.NoEncryption()).decode()
+
+
+def rsa_pem() -> str:
+    return private_pem(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+
+
+def test_legacy_rsa_key_publishes_only_public_members():
+    ring = KeyRing.from_config([], timedelta(minutes=15), rsa_pem(), 'RS256')
+
+    [key] = ring.jwks()['keys']
+
+    assert not PRIVATE_JWK_MEMBERS & key.keys()
+    assert set(key) == {'kty', 'n', 'e', 'alg', 'kid', 'use'}
+
+
+def test_private_verifying_key_is_reduced_to_its_public_half():
+    pem = private_pem(ec.generate_private_key(ec.SECP256R1()))
+    ring = KeyRing.from_config([JWTKeyConfig(kid='ec', algorithm='ES256', signing_key=pem, verifying_key=pem,
+                                             backend='jose')], timedelta(minutes=15), None, None)
+
+    [key] = ring.jwks()['keys']
+
+    assert not PRIVATE_JWK_MEMBERS & key.keys()
+    assert set(key) == {'kty', 'crv', 'x', 'y', 'alg', 'kid', 'use'}
+
+
+def test_legacy_rsa_key_still_verifies_its_own_tokens():
+    ring = KeyRing.from_config([], timedelta(minutes=15), rsa_pem(), 'RS256')
+    key = ring.signing_key()
+
+    token = key.backend.encode({'sub': 'user'}, {'kid': key.kid})
+
+    assert ring.verification_key(key.kid).backend.decode(token) == {'sub': 'user'}
+
+
+def test_symmetric_keys_are_never_published():
+    ring = KeyRing.from_config([], timedelta(minutes=15), 'secret', 'HS256')
+
+    assert ring.jwks() == {'keys': []}
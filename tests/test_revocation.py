@@ -0,0 +1,118 @@
+import time
+import uuid
+import asyncio
+
+import pytest
+
+from datetime import timedelta
+
+from app.cache import CacheSubscriber, DenyList, RevocationEpochs
+from app.cache_backends import MemoryBackend, MemoryPubSub
+
+pytestmark = pytest.mark.anyio
+
+EXPIRES_IN = timedelta(minutes=15)
+
+
+class Instance:
+    def __init__(self, backend: MemoryBackend, reconnect_delay: float = 0.05):
+        self.subscriber = CacheSubscriber(reconnect_delay=reconnect_delay)
+        self.deny_list = DenyList()
+        self.epochs = RevocationEpochs(EXPIRES_IN)
+        for consumer in (self.subscriber, self.deny_list, self.epochs):
+            consumer.client = backend
+        self.subscriber.register(self.deny_list)
+        self.subscriber.register(self.epochs)
+        self.listener = None
+
+    async def connect(self):
+        self.listener = asyncio.create_task(self.subscriber.listen())
+        await settle(lambda: self.deny_list.synced and self.epochs.synced)
+
+    async def disconnect(self):
+        self.listener.cancel()
+        await asyncio.gather(self.listener, return_exceptions=True)
+
+
+async def settle(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def instances():
+    backend = MemoryBackend()
+    first, second = Instance(backend), Instance(backend)
+    await first.connect()
+    await second.connect()
+    yield first, second
+    await first.disconnect()
+    await second.disconnect()
+
+
+async def test_revocation_reaches_the_local_tier_of_other_instances(instances):
+    first, second = instances
+    jti = str(uuid.uuid4())
+
+    await first.deny_list.revoke(jti, EXPIRES_IN)
+
+    await settle(lambda: second.deny_list.local_contains(jti))
+    assert second.deny_list.local_contains(str(uuid.uuid4())) is False
+
+
+async def test_revocation_during_a_dropped_subscription_is_not_missed(instances):
+    first, second = instances
+    jti = str(uuid.uuid4())
+    await second.disconnect()
+
+    await first.deny_list.revoke(jti, EXPIRES_IN)
+
+    assert second.deny_list.local_contains(jti) is None
+    assert await second.deny_list.contains(jti)
+
+    await second.connect()
+    assert second.deny_list.local_contains(jti) is True
+
+
+class DroppedPubSub(MemoryPubSub):
+    dropped = False
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        self.dropped = True
+        raise ConnectionResetError('subscription dropped')
+
+
+async def test_subscription_errors_fall_back_to_the_store_until_resync(instances, monkeypatch):
+    first, second = instances
+    jti = str(uuid.uuid4())
+    backend = second.subscriber.client
+    await second.disconnect()
+    dropped = DroppedPubSub(backend)
+    pubsubs = iter([dropped])
+    monkeypatch.setattr(backend, 'pubsub', lambda: next(pubsubs, None) or MemoryPubSub(backend))
+
+    second.subscriber.reconnect_delay = 0.5
+    second.listener = asyncio.create_task(second.subscriber.listen())
+    await settle(lambda: dropped.dropped and not second.deny_list.synced)
+
+    await first.deny_list.revoke(jti, EXPIRES_IN)
+    assert await second.deny_list.contains(jti)
+
+    await settle(lambda: second.deny_list.synced)
+    assert second.deny_list.local_contains(jti) is True
+
+
+async def test_revoke_all_epochs_survive_a_dropped_subscription(instances):
+    first, second = instances
+    user_id = str(uuid.uuid4())
+    issued_at = time.time() - 1
+    await second.disconnect()
+
+    await first.epochs.revoke_all(user_id)
+
+    assert second.epochs.local_revoked(user_id, issued_at) is None
+    await second.connect()
+    assert second.epochs.local_revoked(user_id, issued_at) is True
+    assert second.epochs.local_revoked(user_id, time.time() + 1) is False
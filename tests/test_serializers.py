@@ -0,0 +1,24 @@
+import json
+import uuid
+
+from datetime import datetime, timezone
+
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+from fastapi import Response
+
+from app.models import Settings
+from app.serializers import settings_serializer
+
+
+def test_uuids_loaded_by_asyncpg_are_rendered_as_strings():
+    now = datetime.now(timezone.utc)
+    user_id = uuid.uuid4()
+    settings = Settings(id=AsyncpgUUID(str(uuid.uuid4())), user_id=AsyncpgUUID(str(user_id)), notifications=True,
+                        dark_mode=False, language='en', timezone='UTC', country='US', created_at=now, updated_at=now)
+
+    single = json.loads(settings_serializer.response(settings).body)
+    page = json.loads(settings_serializer.page_response({'items': [settings], 'next_cursor': None, 'next': None},
+                                                        Response()).body)
+
+    assert single['user_id'] == str(user_id)
+    assert page['items'] == [single]
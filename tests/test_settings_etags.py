@@ -0,0 +1,40 @@
+import pytest
+
+from app.constants import RoleType
+from app.controllers import SettingsController
+
+pytestmark = pytest.mark.anyio
+
+SETTINGS = {'notifications': True, 'dark_mode': True, 'language': 'en', 'timezone': 'UTC', 'country': 'US'}
+
+
+async def test_changed_settings_are_not_answered_with_304(client, login):
+    user_id, headers = await login(RoleType.USER)
+    response = await client.get('/api/v1/users/settings/', headers=headers)
+    etag = response.headers['etag']
+    assert (await client.get('/api/v1/users/settings/',
+                             headers={**headers, 'If-None-Match': etag})).status_code == 304
+
+    await client.put('/api/v1/users/settings/', headers=headers, json={**SETTINGS, 'user_id': user_id})
+
+    assert (await client.get('/api/v1/users/settings/',
+                             headers={**headers, 'If-None-Match': etag})).status_code == 200
+
+
+async def test_update_during_a_read_does_not_leave_a_stale_etag(client, login, monkeypatch):
+    user_id, headers = await login(RoleType.USER)
+    get_by_user_id = SettingsController.get_by_user_id
+
+    async def read_then_update(db, owner_id):
+        settings = await get_by_user_id(db, owner_id)
+        monkeypatch.setattr(SettingsController, 'get_by_user_id', get_by_user_id)
+        response = await client.put('/api/v1/users/settings/', headers=headers, json={**SETTINGS, 'user_id': user_id})
+        assert response.status_code == 200
+        return settings
+
+    monkeypatch.setattr(SettingsController, 'get_by_user_id', read_then_update)
+    stale_etag = (await client.get('/api/v1/users/settings/', headers=headers)).headers['etag']
+
+    response = await client.get('/api/v1/users/settings/', headers={**headers, 'If-None-Match': stale_etag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != stale_etag
@@ -0,0 +1,130 @@
+import uuid
+
+import pytest
+
+from sqlalchemy import event
+
+from app.constants import RoleType
+from app.database import database, after_commit, commit
+
+from tests.conftest import PASSWORD
+
+pytestmark = pytest.mark.anyio
+
+SETTINGS = {'notifications': True, 'dark_mode': True, 'language': 'en', 'timezone': 'UTC', 'country': 'US'}
+
+
+class Session:
+    def __init__(self):
+        self.info = {}
+        self.committed = False
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def statements(client):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split(None, 1)[0].upper())
+
+    event.listen(database.engine.sync_engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(database.engine.sync_engine, 'before_cursor_execute', record)
+
+
+async def test_register_inserts_user_and_settings_in_one_statement(client, statements):
+    response = await client.post('/api/v1/auth/register', json={'username': 'new', 'name': 'New',
+                                                                'email': 'new@example.com', 'hashed_password': PASSWORD})
+
+    assert response.status_code == 201
+    assert statements == ['SELECT', 'WITH']
+
+
+async def test_duplicate_registration_is_rejected_before_hashing(client, monkeypatch):
+    from app.hashing import password_hasher
+
+    account = {'username': 'twice', 'name': 'Twice', 'email': 'twice@example.com', 'hashed_password': PASSWORD}
+    assert (await client.post('/api/v1/auth/register', json=account)).status_code == 201
+
+    async def hash_password(password):
+        raise AssertionError('hashed a password for a duplicate account')
+
+    monkeypatch.setattr(password_hasher, 'hash_password', hash_password)
+    duplicates = [account, {**account, 'username': 'other'},
+                  {**account, 'username': 'third', 'email': 'TWICE@example.com'}]
+    for duplicate in duplicates:
+        assert (await client.post('/api/v1/auth/register', json=duplicate)).status_code == 409
+
+
+async def test_login_reads_the_user_once(client, login, statements):
+    _, headers = await login(RoleType.USER)
+    username = (await client.get('/api/v1/auth/token/verify', headers=headers)).json()['username']
+    statements.clear()
+
+    response = await client.post('/api/v1/auth/token', data={'username': username, 'password': PASSWORD})
+
+    assert response.status_code == 200
+    assert statements == ['SELECT']
+
+
+async def test_authenticated_reads_hit_the_database_once_per_user(client, login, statements):
+    _, headers = await login(RoleType.USER)
+    statements.clear()
+
+    assert (await client.get('/api/v1/auth/token/verify', headers=headers)).status_code == 200
+    assert statements == ['SELECT']
+    assert (await client.get('/api/v1/auth/token/verify', headers=headers)).status_code == 200
+    assert statements == ['SELECT']
+
+
+async def test_settings_read_and_update_statements(client, login, statements):
+    user_id, headers = await login(RoleType.USER)
+    statements.clear()
+
+    assert (await client.get('/api/v1/users/settings/', headers=headers)).status_code == 200
+    assert statements == ['SELECT']
+    statements.clear()
+
+    response = await client.put('/api/v1/users/settings/', headers=headers, json={**SETTINGS, 'user_id': user_id})
+    assert response.status_code == 200
+    assert statements == ['SELECT', 'SELECT', 'UPDATE']
+
+
+async def test_bulk_create_leaves_the_commit_to_the_unit_of_work(client, login):
+    from app.controllers import UserController
+    from app.utils import ProcessPassword
+
+    user = {'id': uuid.uuid4(), 'username': 'rolled_back', 'name': 'Rolled Back', 'email': 'rolled_back@example.com',
+            'hashed_password': ProcessPassword.hash_password(PASSWORD)}
+    async with database.session_factory() as db:
+        assert len(await UserController.bulk_create(db, [user])) == 1
+        await db.rollback()
+    async with database.session_factory() as db:
+        assert await UserController.get_by_username(db, 'rolled_back') is None
+
+    _, headers = await login(RoleType.ADMIN)
+    rows = [{'username': f'bulk_{index}', 'name': 'Bulk', 'email': f'bulk_{index}@example.com',
+             'hashed_password': PASSWORD} for index in range(2)]
+    response = await client.post('/api/v1/users/bulk', headers=headers, json=rows)
+    assert response.json()['created'] == 2
+    async with database.session_factory() as db:
+        assert await UserController.get_by_username(db, 'bulk_1') is not None
+
+
+async def test_failing_after_commit_callback_does_not_skip_the_rest():
+    db, called = Session(), []
+
+    async def fail():
+        raise ConnectionError('cache is down')
+
+    async def record():
+        called.append(True)
+
+    after_commit(db, fail)
+    after_commit(db, record)
+    await commit(db)
+
+    assert db.committed and called == [True]
@@ -0,0 +1,76 @@
+import uuid
+
+import pytest
+
+from datetime import datetime, timezone
+
+from app.cache import user_cache
+from app.cache_backends import MemoryBackend
+from app.constants import RoleType
+from app.controllers import UserController
+from app.models import Users
+
+pytestmark = pytest.mark.anyio
+
+
+def make_user(role: str) -> Users:
+    now = datetime.now(timezone.utc)
+    return Users(id=uuid.uuid4(), username='cached', name='Cached', email='cached@example.com',
+                 hashed_password='x', verified=True, role=role, created_at=now, updated_at=now)
+
+
+async def test_role_change_takes_effect_on_the_next_request(client, login):
+    _, admin_headers = await login(RoleType.ADMIN)
+    user_id, headers = await login(RoleType.ADMIN)
+    assert (await client.get('/api/v1/users/', headers=headers)).status_code == 200
+
+    response = await client.put(f'/api/v1/users/{user_id}', headers=admin_headers,
+                                json={'username': 'demoted', 'name': 'Demoted', 'email': 'demoted@example.com',
+                                      'role': RoleType.USER, 'verified': True})
+    assert response.status_code == 200
+
+    assert (await client.get('/api/v1/users/', headers=headers)).status_code == 403
+    assert 'user_cache_hit_rate' in (await client.get('/metrics')).text
+
+
+async def test_update_of_a_user_deleted_after_the_lookup_is_not_found(client, login, monkeypatch):
+    _, admin_headers = await login(RoleType.ADMIN)
+    missing = make_user(RoleType.USER)
+    get = UserController.get
+
+    async def stale_get(db, user_id: str) -> Users:
+        return missing if user_id == str(missing.id) else await get(db, user_id)
+
+    monkeypatch.setattr(UserController, 'get', stale_get)
+    response = await client.put(f'/api/v1/users/{missing.id}', headers=admin_headers,
+                                json={'username': 'gone', 'name': 'Gone', 'email': 'gone@example.com',
+                                      'role': RoleType.USER, 'verified': True})
+
+    assert response.status_code == 404
+
+
+async def test_invalidation_during_a_fill_is_not_overwritten(monkeypatch):
+    monkeypatch.setattr(user_cache, 'client', MemoryBackend())
+    admin = make_user(RoleType.ADMIN)
+
+    async def read_then_demote(db, user_id: str) -> Users:
+        await user_cache.invalidate(user_id)
+        return admin
+
+    monkeypatch.setattr(UserController, 'get', read_then_demote)
+    assert (await UserController.get_cached(None, str(admin.id))).role == RoleType.ADMIN
+
+    assert await user_cache.get(str(admin.id)) is None
+
+
+async def test_fill_without_a_concurrent_invalidation_is_cached(monkeypatch):
+    monkeypatch.setattr(user_cache, 'client', MemoryBackend())
+    user = make_user(RoleType.USER)
+
+    async def read(db, user_id: str) -> Users:
+        return user
+
+    monkeypatch.setattr(UserController, 'get', read)
+    await UserController.get_cached(None, str(user.id))
+
+    assert await user_cache.get(str(user.id)) is not None
@@ -0,0 +1,11 @@
+from app.constants import SearchMatch
+from app.controllers import UserController
+
+
+def test_short_terms_keep_contains_semantics():
+    assert UserController.like_pattern('ab', SearchMatch.CONTAINS) == '%ab%'
+    assert UserController.like_pattern('ab', SearchMatch.PREFIX) == 'ab%'
+
+
+def test_like_wildcards_in_terms_are_escaped():
+    assert UserController.like_pattern('a_b%', SearchMatch.CONTAINS) == '%a/_b/%%'
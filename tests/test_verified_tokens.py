@@ -0,0 +1,44 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def metric(body: str, name: str) -> float:
+    return float(next(line.split()[1] for line in body.splitlines() if line.startswith(f'{name} ')))
+
+
+async def test_verified_token_cache_hits_are_exported(client, login):
+    _, headers = await login('user')
+    before = (await client.get('/metrics')).text
+
+    for _ in range(3):
+        assert (await client.get('/api/v1/auth/token/verify', headers=headers)).status_code == 200
+
+    after = (await client.get('/metrics')).text
+    assert metric(after, 'verified_token_cache_hits_total') - metric(before, 'verified_token_cache_hits_total') >= 2
+    assert metric(after, 'verified_token_cache_size') >= 1
+
+
+def test_cached_token_stops_validating_once_its_key_is_retired(monkeypatch):
+    from datetime import timedelta
+
+    from app.config import JWTKeyConfig
+    from app.constants import TokenType
+    from app.exceptions import UnauthorizedException
+    from app.keys import KeyRing, keyrings
+    from app.utils import ProcessToken, verified_tokens
+
+    ring = KeyRing.from_config([JWTKeyConfig(kid='old', algorithm='HS256', signing_key='old-secret')],
+                               timedelta(minutes=15), None, None)
+    monkeypatch.setitem(keyrings, TokenType.ACCESS, ring)
+    monkeypatch.setattr(verified_tokens, 'maxsize', 10)
+    payload = ProcessToken.create_token_payload({'sub': 'user', 'user_id': 'id', 'user_role': 'user'},
+                                                 timedelta(minutes=15))
+    token = ProcessToken.create_token(payload, TokenType.ACCESS)
+
+    assert ProcessToken.validate_token(token).sub == 'user'
+    ring.keys[0].retire_at = 0.0
+    hits = verified_tokens.hits
+    with pytest.raises(UnauthorizedException):
+        ProcessToken.validate_token(token)
+    assert verified_tokens.hits == hits + 1